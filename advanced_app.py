@@ -2,10 +2,31 @@ import streamlit as st
 import sqlite3
 import time
 import json
+import base64
+import heapq
+import itertools
+import collections
 import pickle
 import os
+import sys
+import atexit
+import bisect
+import codecs
+import threading
+import unicodedata
+from array import array
 from datetime import datetime
-from pybloom_live import BloomFilter
+from catalog import ensure_stats_catalog, get_frame_cache, read_stats
+from database import BufferedWriter, FrequencyBuffer, get_database
+from dawg import DAWG_PATH, Automaton, compile_dawg
+from history import get_history
+from latency import PERCENTILES, LatencyHistograms
+from prefix_filter import PrefixFilter
+from result_cache import ResultCache
+from schema import ensure_names, ensure_schema, insert_metrics, insert_words, name_id
+from shared_engine import LazyBuilder, SnapshotSwap, catch_up
+from snapshot import SNAPSHOT_PATH, ensure_change_counter, open_snapshot, words_version, write_snapshot
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -13,88 +34,205 @@ from plotly.subplots import make_subplots
 
 # Database setup
 def init_database():
-    conn = sqlite3.connect('autocomplete.db')
-    cursor = conn.cursor()
-    
-    # Words table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS words (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            word TEXT UNIQUE NOT NULL,
-            frequency INTEGER DEFAULT 0,
-            category TEXT DEFAULT 'general',
-            language TEXT DEFAULT 'en',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Search history table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS search_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            prefix TEXT NOT NULL,
-            suggestions TEXT NOT NULL,
-            selected_word TEXT,
-            algorithm TEXT NOT NULL,
-            search_time REAL NOT NULL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Performance metrics table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS performance_metrics (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            algorithm TEXT NOT NULL,
-            operation TEXT NOT NULL,
-            execution_time REAL NOT NULL,
-            memory_usage REAL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+    get_database().run(_create_tables)
+
+def _create_tables(conn):
+    # Normalized tables, migrating a legacy database first
+    ensure_schema(conn)
     
-    conn.commit()
-    conn.close()
+    # Dashboard statistics kept current by triggers
+    ensure_stats_catalog(conn)
 
 # Data Structures
+MAX_SUGGESTIONS = 9  # Suggestions rendered in the UI grid
+
+def _rank_key(node):
+    # Highest frequency first, ties broken alphabetically
+    return (-node.frequency, node.word)
+
+# Heap entries for best-first ranked traversal: (-frequency, key, kind,
+# tiebreak, node). Words use their own text as key; subtrees use a string that
+# is a lower bound of every word inside them, so entries pop in
+# (-frequency, word) order and each subtree is expanded only when it can still
+# hold the next result.
+_SUBTREE, _WORD = 0, 1
+
+def encode_cursor(word, frequency):
+    """Opaque token that resumes a ranked listing after (word, frequency)"""
+    payload = json.dumps([frequency, word]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    frequency, word = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return (-frequency, word)
+
+def _ranked_words(heap, expand, cursor):
+    """Pop the heap in rank order, yielding words ranked after the cursor"""
+    after = decode_cursor(cursor)
+    tiebreak = itertools.count(len(heap))
+    heapq.heapify(heap)
+    while heap:
+        neg_freq, key, kind, _, node = heapq.heappop(heap)
+        if kind == _WORD:
+            if after is None or (neg_freq, key) > after:
+                yield key, -neg_freq
+            continue
+        for entry in expand(node, key):
+            heapq.heappush(heap, entry[:3] + (next(tiebreak),) + entry[3:])
+
+def _refresh_bounds(path, frequency, lowered):
+    """Recompute max_freq along a root-to-terminal path of dict-children nodes"""
+    if lowered:
+        for node in reversed(path):
+            node.max_freq = max(
+                [node.frequency if node.is_end else 0]
+                + [child.max_freq for child in node.children.values()]
+            )
+    else:
+        for node in path:
+            if frequency > node.max_freq:
+                node.max_freq = frequency
+
+def _merge_pending(ranked, pending, prefix, cursor):
+    """Fold words not yet built into a static engine into its ranked stream"""
+    if not pending:
+        return ranked
+    after = decode_cursor(cursor)
+    extra = sorted(
+        (-frequency, word) for word, frequency in pending.items()
+        if word.startswith(prefix) and (after is None or (-frequency, word) > after)
+    )
+    extra = ((word, -neg_freq) for neg_freq, word in extra)
+    return heapq.merge(ranked, extra, key=lambda item: (-item[1], item[0]))
+
 class TrieNode:
     def __init__(self):
         self.children = {}
         self.is_end = False
         self.word = None
         self.frequency = 0
+        self.count = 0  # Words in this subtree
+        self.max_freq = 0  # Highest frequency in this subtree
+        self.top = None  # Ranked terminal nodes of this subtree (top-k mode only)
 
 class Trie:
-    def __init__(self):
-        self.root = TrieNode()
+    def __init__(self, top_k=None):
+        self.top_k = top_k
+        self.root = self._new_node()
+
+    def _new_node(self):
+        node = TrieNode()
+        if self.top_k:
+            node.top = []
+        return node
+
+    def _find(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
 
     def insert(self, word, frequency=0):
         node = self.root
+        path = [node]
         for char in word:
             if char not in node.children:
-                node.children[char] = TrieNode()
+                node.children[char] = self._new_node()
             node = node.children[char]
+            path.append(node)
+        if not node.is_end:
+            for ancestor in path:
+                ancestor.count += 1
+        lowered = node.is_end and frequency < node.frequency
         node.is_end = True
         node.word = word
         node.frequency = frequency
+        self._refresh_path(path, node, lowered)
 
-    def get_suggestions(self, prefix):
+    def increment(self, word, delta=1):
         node = self.root
-        for char in prefix:
-            if char not in node.children:
+        path = [node]
+        for char in word:
+            node = node.children.get(char)
+            if node is None:
+                return False
+            path.append(node)
+        if not node.is_end:
+            return False
+        node.frequency += delta
+        self._refresh_path(path, node, delta < 0)
+        return True
+
+    def _refresh_path(self, path, terminal, lowered):
+        """Update subtree bounds and cached top-k lists along a changed word's path"""
+        _refresh_bounds(path, terminal.frequency, lowered)
+        if self.top_k:
+            self._refresh_top(path, terminal, lowered)
+
+    def _refresh_top(self, path, terminal, lowered):
+        if lowered:
+            # A demoted word may fall out of a list, so rebuild each list
+            # bottom-up from the (already exact) lists of its children.
+            for node in reversed(path):
+                candidates = [node] if node.is_end else []
+                for child in node.children.values():
+                    candidates.extend(child.top)
+                node.top = heapq.nsmallest(self.top_k, candidates, key=_rank_key)
+            return
+        key = _rank_key(terminal)
+        for node in reversed(path):
+            top = node.top
+            if terminal in top:
+                top.sort(key=_rank_key)
+            elif len(top) < self.top_k or key < _rank_key(top[-1]):
+                top.append(terminal)
+                top.sort(key=_rank_key)
+                del top[self.top_k:]
+            else:
+                # Ancestors hold a superset of this subtree, so their k-th
+                # entry ranks at least as high and the word cannot enter them.
+                break
+
+    def get_suggestions(self, prefix, limit=None):
+        if self.top_k and limit is not None and limit <= self.top_k:
+            node = self._find(prefix)
+            if node is None:
                 return []
-            node = node.children[char]
+            return [terminal.word for terminal in node.top[:limit]]
+        ranked = self.iter_suggestions(prefix)
+        return [word for word, freq in itertools.islice(ranked, limit)]
 
-        results = []
-        self._collect_words(node, results)
-        results.sort(key=lambda w: w[1], reverse=True)  # Sort by frequency
-        return [word for word, freq in results]
+    def first_page(self, prefix, limit):
+        """The top limit (word, frequency) completions and whether more exist"""
+        if not self.top_k or limit > self.top_k:
+            ranked = list(itertools.islice(self.iter_suggestions(prefix), limit + 1))
+            return ranked[:limit], len(ranked) > limit
+        node = self._find(prefix)
+        if node is None:
+            return [], False
+        return [(terminal.word, terminal.frequency) for terminal in node.top[:limit]], node.count > limit
 
-    def _collect_words(self, node, results):
+    def iter_suggestions(self, prefix, cursor=None):
+        """Yield (word, frequency) completions in rank order, on demand"""
+        node = self._find(prefix)
+        if node is None:
+            return iter(())
+        return _ranked_words([(-node.max_freq, prefix, _SUBTREE, 0, node)], self._expand, cursor)
+
+    @staticmethod
+    def _expand(node, stem):
         if node.is_end:
-            results.append((node.word, node.frequency))
-        for child in node.children.values():
-            self._collect_words(child, results)
+            yield (-node.frequency, stem, _WORD, None)
+        for char, child in node.children.items():
+            yield (-child.max_freq, stem + char, _SUBTREE, child)
+
+    def count_completions(self, prefix):
+        node = self._find(prefix)
+        return node.count if node else 0
 
 class TSTNode:
     def __init__(self, char):
@@ -105,6 +243,14 @@ class TSTNode:
         self.is_end = False
         self.word = None
         self.frequency = 0
+        self.count = 0  # Words in this subtree (left, eq, right)
+        self.max_freq = 0  # Highest frequency in this subtree (left, eq, right)
+
+def _subtree_max(node):
+    return node.max_freq if node else 0
+
+def _subtree_count(node):
+    return node.count if node else 0
 
 class TernarySearchTree:
     def __init__(self):
@@ -113,67 +259,177 @@ class TernarySearchTree:
     def insert(self, word, frequency=0):
         if not word:
             return
-        self.root = self._insert(self.root, word, 0, frequency)
+        if self.root is None:
+            self.root = TSTNode(word[0])
+        node, index = self.root, 0
+        path = [node]
+        while True:
+            char = word[index]
+            if char < node.char:
+                if node.left is None:
+                    node.left = TSTNode(char)
+                node = node.left
+            elif char > node.char:
+                if node.right is None:
+                    node.right = TSTNode(char)
+                node = node.right
+            elif index + 1 < len(word):
+                index += 1
+                if node.eq is None:
+                    node.eq = TSTNode(word[index])
+                node = node.eq
+            else:
+                break
+            path.append(node)
 
-    def _insert(self, node, word, index, frequency):
-        char = word[index]
-        if not node:
-            node = TSTNode(char)
-        if char < node.char:
-            node.left = self._insert(node.left, word, index, frequency)
-        elif char > node.char:
-            node.right = self._insert(node.right, word, index, frequency)
+        if not node.is_end:
+            for ancestor in path:
+                ancestor.count += 1
+        lowered = node.is_end and frequency < node.frequency
+        node.is_end = True
+        node.word = word
+        node.frequency = frequency
+        self._refresh_bounds(path, frequency, lowered)
+
+    @staticmethod
+    def _refresh_bounds(path, frequency, lowered):
+        if lowered:
+            for node in reversed(path):
+                node.max_freq = max(
+                    node.frequency if node.is_end else 0,
+                    _subtree_max(node.left), _subtree_max(node.eq), _subtree_max(node.right)
+                )
         else:
-            if index + 1 < len(word):
-                node.eq = self._insert(node.eq, word, index + 1, frequency)
-            else:
-                node.is_end = True
-                node.word = word
-                node.frequency = frequency
-        return node
+            for node in path:
+                if frequency > node.max_freq:
+                    node.max_freq = frequency
+
+    def bulk_load(self, items):
+        """Rebuild from the merged, sorted words, inserting medians first.
+
+        Each sibling chain then receives its middle character first, which
+        keeps left/right depth near log of the alphabet regardless of the
+        order the words table arrives in.
+        """
+        words = sorted(dict(itertools.chain(self.items(), items)).items())
+        self.root = None
+        ranges = collections.deque([(0, len(words))])
+        while ranges:
+            lo, hi = ranges.popleft()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            self.insert(*words[mid])
+            ranges.append((lo, mid))
+            ranges.append((mid + 1, hi))
+
+    def items(self):
+        """(word, frequency) pairs, visiting nodes without recursion"""
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            if node.is_end:
+                yield node.word, node.frequency
+            stack.extend(child for child in (node.left, node.eq, node.right) if child)
+
+    def get_suggestions(self, prefix, limit=None):
+        ranked = self.iter_suggestions(prefix)
+        return [word for word, freq in itertools.islice(ranked, limit)]
 
-    def get_suggestions(self, prefix):
+    def top_k(self, prefix, k):
+        """Best-first search that stops once no subtree can beat the k-th word"""
+        return self.get_suggestions(prefix, k)
+
+    def iter_suggestions(self, prefix, cursor=None):
+        """Yield (word, frequency) completions in rank order, on demand"""
         if not prefix:
-            return []
-        node = self._search(self.root, prefix, 0)
+            return iter(())
+        node = self._search(prefix)
         if not node:
-            return []
-        results = []
-        self._collect_words(node, prefix, results)
-        results.sort(key=lambda w: w[1], reverse=True)
-        return [word for word, freq in results]
+            return iter(())
+        heap = []
+        if node.is_end:
+            heap.append((-node.frequency, node.word, _WORD, 0, None))
+        if node.eq:
+            heap.append((-node.eq.max_freq, prefix, _SUBTREE, 1, node.eq))
+        return _ranked_words(heap, self._expand, cursor)
 
-    def _search(self, node, prefix, index):
-        if not node:
-            return None
-        char = prefix[index]
-        if char < node.char:
-            return self._search(node.left, prefix, index)
-        elif char > node.char:
-            return self._search(node.right, prefix, index)
-        else:
-            if index + 1 == len(prefix):
-                return node
-            return self._search(node.eq, prefix, index + 1)
+    @staticmethod
+    def _expand(node, stem):
+        # Every word below node starts with stem, the text above node.char
+        for sibling in (node.left, node.right):
+            if sibling:
+                yield (-sibling.max_freq, stem, _SUBTREE, sibling)
+        if node.is_end:
+            yield (-node.frequency, node.word, _WORD, None)
+        if node.eq:
+            yield (-node.eq.max_freq, stem + node.char, _SUBTREE, node.eq)
 
-    def _collect_words(self, node, prefix, results):
+    def count_completions(self, prefix):
+        if not prefix:
+            return 0
+        node = self._search(prefix)
         if not node:
-            return
-        self._collect_words(node.left, prefix, results)
-        new_prefix = prefix + node.char
-        if node.is_end:
-            results.append((node.word, node.frequency))
-        self._collect_words(node.eq, new_prefix, results)
-        self._collect_words(node.right, prefix, results)
+            return 0
+        return node.is_end + _subtree_count(node.eq)
+
+    def increment(self, word, delta=1):
+        path = self._path(word) if word else None
+        if not path or not path[-1].is_end:
+            return False
+        path[-1].frequency += delta
+        self._refresh_bounds(path, path[-1].frequency, delta < 0)
+        return True
+
+    def _search(self, prefix):
+        """Node holding the last character of prefix, or None"""
+        path = self._path(prefix)
+        return path[-1] if path else None
+
+    def _path(self, prefix):
+        """Nodes visited while spelling prefix, or None if it is absent"""
+        node, index = self.root, 0
+        path = []
+        while node:
+            path.append(node)
+            char = prefix[index]
+            if char < node.char:
+                node = node.left
+            elif char > node.char:
+                node = node.right
+            elif index + 1 == len(prefix):
+                return path
+            else:
+                index += 1
+                node = node.eq
+        return None
 
 class BSTNode:
     def __init__(self, word, frequency=0):
         self.word = word
         self.frequency = frequency
+        self.size = 1  # Nodes in this subtree
+        self.height = 1
+        self.max_freq = frequency  # Highest frequency in this subtree
         self.left = None
         self.right = None
 
+def _subtree_size(node):
+    return node.size if node else 0
+
+def _height(node):
+    return node.height if node else 0
+
+def _prefix_upper_bound(prefix):
+    """Smallest string greater than every string starting with prefix"""
+    while prefix and prefix[-1] == chr(sys.maxunicode):
+        prefix = prefix[:-1]
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
 class BinarySearchTree:
+    """AVL-balanced BST, so depth stays O(log n) for sorted or grouped input"""
     def __init__(self):
         self.root = None
 
@@ -189,168 +445,1238 @@ class BinarySearchTree:
             node.right = self._insert(node.right, word, frequency)
         else:
             node.frequency = frequency
+        return self._rebalance(node)
+
+    def increment(self, word, delta=1):
+        node, path = self.root, []
+        while node and node.word != word:
+            path.append(node)
+            node = node.left if word < node.word else node.right
+        if not node:
+            return False
+        node.frequency += delta
+        for changed in [node] + path[::-1]:
+            changed.max_freq = max(changed.frequency, _subtree_max(changed.left), _subtree_max(changed.right))
+        return True
+
+    @staticmethod
+    def _update(node):
+        node.size = 1 + _subtree_size(node.left) + _subtree_size(node.right)
+        node.height = 1 + max(_height(node.left), _height(node.right))
+        node.max_freq = max(node.frequency, _subtree_max(node.left), _subtree_max(node.right))
+
+    def _rotate_left(self, node):
+        pivot = node.right
+        node.right, pivot.left = pivot.left, node
+        self._update(node)
+        self._update(pivot)
+        return pivot
+
+    def _rotate_right(self, node):
+        pivot = node.left
+        node.left, pivot.right = pivot.right, node
+        self._update(node)
+        self._update(pivot)
+        return pivot
+
+    def _rebalance(self, node):
+        self._update(node)
+        balance = _height(node.left) - _height(node.right)
+        if balance > 1:
+            if _height(node.left.left) < _height(node.left.right):
+                node.left = self._rotate_left(node.left)
+            return self._rotate_right(node)
+        if balance < -1:
+            if _height(node.right.right) < _height(node.right.left):
+                node.right = self._rotate_right(node.right)
+            return self._rotate_left(node)
         return node
 
-    def get_suggestions(self, prefix):
-        results = []
-        self._collect_with_prefix(self.root, prefix, results)
-        results.sort(key=lambda w: w[1], reverse=True)
-        return [word for word, freq in results]
+    def bulk_load(self, items):
+        """Rebuild as a perfectly balanced tree from the merged, sorted words"""
+        words = dict(self.items())
+        words.update(items)
+        self.root = self._build(sorted(words.items()), 0, len(words))
 
-    def _collect_with_prefix(self, node, prefix, results):
-        if not node:
+    def _build(self, items, lo, hi):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        node = BSTNode(*items[mid])
+        node.left = self._build(items, lo, mid)
+        node.right = self._build(items, mid + 1, hi)
+        self._update(node)
+        return node
+
+    def items(self):
+        """(word, frequency) pairs in sorted order"""
+        stack, node = [], self.root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.word, node.frequency
+            node = node.right
+
+    def get_suggestions(self, prefix, limit=None):
+        ranked = self.iter_suggestions(prefix)
+        return [word for word, freq in itertools.islice(ranked, limit)]
+
+    def top_k(self, prefix, k):
+        """Best-first search over the subtrees overlapping the prefix range"""
+        return self.get_suggestions(prefix, k)
+
+    def iter_suggestions(self, prefix, cursor=None):
+        """Yield (word, frequency) completions in rank order, on demand"""
+        if not self.root:
+            return iter(())
+        heap = [(-self.root.max_freq, prefix, _SUBTREE, 0, self.root)]
+        expand = lambda node, bound: self._expand(node, bound, prefix)
+        return _ranked_words(heap, expand, cursor)
+
+    @staticmethod
+    def _expand(node, bound, prefix):
+        # bound is a lower bound for every in-range word below node
+        word = node.word
+        if word.startswith(prefix):
+            yield (-node.frequency, word, _WORD, None)
+            children = ((node.left, bound), (node.right, word))
+        elif word < prefix:
+            children = ((node.right, bound),)
+        else:
+            children = ((node.left, bound),)
+        for child, child_bound in children:
+            if child:
+                yield (-child.max_freq, child_bound, _SUBTREE, child)
+
+    def count_completions(self, prefix):
+        upper = _prefix_upper_bound(prefix)
+        total = self._count_below(upper) if upper else _subtree_size(self.root)
+        return total - self._count_below(prefix)
+
+    def _count_below(self, key):
+        """Number of words that sort strictly before key"""
+        node, total = self.root, 0
+        while node:
+            if node.word < key:
+                total += 1 + _subtree_size(node.left)
+                node = node.right
+            else:
+                node = node.left
+        return total
+
+class RadixNode:
+    def __init__(self, label=''):
+        self.label = label  # Edge label from the parent
+        self.children = {}  # First character of each child's label -> child
+        self.is_end = False
+        self.word = None
+        self.frequency = 0
+        self.count = 0  # Words in this subtree
+        self.max_freq = 0  # Highest frequency in this subtree
+
+class RadixTree:
+    """Patricia tree: single-child chains collapse into one labelled edge"""
+    def __init__(self):
+        self.root = RadixNode()
+
+    def _find(self, prefix):
+        """Node covering every completion of prefix, with that node's full text"""
+        node, index = self.root, 0
+        while index < len(prefix):
+            child = node.children.get(prefix[index])
+            if child is None:
+                return None, None
+            label = child.label
+            if prefix.startswith(label, index):
+                node, index = child, index + len(label)
+            elif label.startswith(prefix[index:]):
+                # Prefix ends inside this edge; the whole edge still applies
+                return child, prefix[:index] + label
+            else:
+                return None, None
+        return node, prefix
+
+    def _path(self, word):
+        """Nodes spelling exactly word, or None"""
+        node, index = self.root, 0
+        path = [node]
+        while index < len(word):
+            child = node.children.get(word[index])
+            if child is None or not word.startswith(child.label, index):
+                return None
+            node, index = child, index + len(child.label)
+            path.append(node)
+        return path
+
+    def insert(self, word, frequency=0):
+        node, index = self.root, 0
+        path = [node]
+        while index < len(word):
+            child = node.children.get(word[index])
+            if child is None:
+                child = RadixNode(word[index:])
+                node.children[word[index]] = child
+            elif not word.startswith(child.label, index):
+                child = self._split(node, child, word, index)
+            node, index = child, index + len(child.label)
+            path.append(node)
+        if not node.is_end:
+            for ancestor in path:
+                ancestor.count += 1
+        lowered = node.is_end and frequency < node.frequency
+        node.is_end = True
+        node.word = word
+        node.frequency = frequency
+        _refresh_bounds(path, frequency, lowered)
+
+    @staticmethod
+    def _split(parent, child, word, index):
+        """Cut child's edge where it stops matching word; return the new middle node"""
+        label = child.label
+        common = 1
+        while common < len(label) and index + common < len(word) and label[common] == word[index + common]:
+            common += 1
+        middle = RadixNode(label[:common])
+        middle.count = child.count
+        middle.max_freq = child.max_freq
+        child.label = label[common:]
+        middle.children[child.label[0]] = child
+        parent.children[label[0]] = middle
+        return middle
+
+    def increment(self, word, delta=1):
+        path = self._path(word)
+        if not path or not path[-1].is_end:
+            return False
+        path[-1].frequency += delta
+        _refresh_bounds(path, path[-1].frequency, delta < 0)
+        return True
+
+    def get_suggestions(self, prefix, limit=None):
+        ranked = self.iter_suggestions(prefix)
+        return [word for word, freq in itertools.islice(ranked, limit)]
+
+    def iter_suggestions(self, prefix, cursor=None):
+        """Yield (word, frequency) completions in rank order, on demand"""
+        node, stem = self._find(prefix)
+        if node is None:
+            return iter(())
+        return _ranked_words([(-node.max_freq, stem, _SUBTREE, 0, node)], self._expand, cursor)
+
+    @staticmethod
+    def _expand(node, stem):
+        if node.is_end:
+            yield (-node.frequency, stem, _WORD, None)
+        for child in node.children.values():
+            yield (-child.max_freq, stem + child.label, _SUBTREE, child)
+
+    def count_completions(self, prefix):
+        node, stem = self._find(prefix)
+        return node.count if node else 0
+
+class DoubleArrayTrie:
+    """Trie packed into flat base/check arrays over a single word arena.
+
+    A transition from slot s on character code c leads to t = base[s] + c and
+    is valid when check[t] == s. Code 0 marks end-of-word; its slot stores
+    -(word_id + 1) in base. first_code/next_code chain each node's child
+    codes so children are enumerated without probing the whole alphabet.
+    Words added after a build are kept in a small pending map and folded in
+    by the next rebuild.
+    """
+    ROOT = 1
+    NO_CODE = 0xFFFF
+    REBUILD_THRESHOLD = 1024
+    TABLES = ('arena', 'offsets', 'frequencies', 'base', 'check',
+              'first_code', 'next_code', 'counts', 'max_freq')
+
+    def __init__(self):
+        self._build([])
+
+    def tables(self):
+        """Flat arrays of the built trie, for write_snapshot"""
+        if self.pending:
+            self.bulk_load([])
+        tables = {name: getattr(self, name) for name in self.TABLES}
+        tables['alphabet'] = array('I', [ord(char) for char in self.chars[1:]])
+        return tables
+
+    @classmethod
+    def from_tables(cls, tables):
+        """Trie over arrays from tables(); memoryviews of a snapshot work as is"""
+        trie = cls.__new__(cls)
+        for name in cls.TABLES:
+            setattr(trie, name, tables[name])
+        trie.chars = [''] + [chr(code) for code in tables['alphabet']]
+        trie.codes = {char: code for code, char in enumerate(trie.chars) if code}
+        trie.pending = {}
+        return trie
+
+    def __len__(self):
+        return len(self.frequencies) + len(self.pending)
+
+    def bulk_load(self, items):
+        words = dict(self.items())
+        words.update(items)
+        self._build(sorted(words.items()))
+
+    def items(self):
+        for word_id, frequency in enumerate(self.frequencies):
+            yield self._word(word_id), frequency
+        yield from self.pending.items()
+
+    def _build(self, items):
+        words = [word for word, freq in items]
+        self.pending = {}
+        self.chars = [''] + sorted({char for word in words for char in word})
+        self.codes = {char: code for code, char in enumerate(self.chars) if code}
+
+        arena = bytearray()
+        self.offsets = array('I', [0])
+        self.frequencies = array('q')
+        for word, frequency in items:
+            arena += word.encode()
+            self.offsets.append(len(arena))
+            self.frequencies.append(frequency)
+        self.arena = bytes(arena)
+
+        # Slot 0 is unused and slot 1 is the root; check == 0 marks a free slot
+        base = array('i', [0, 0])
+        check = array('i', [-1, -1])
+        first_code = array('H', [self.NO_CODE] * 2)
+        next_code = array('H', [self.NO_CODE] * 2)
+        order = []  # Slots in creation order, parents before children
+        next_free = used = 2
+        stack = [(self.ROOT, 0, len(words), 0)]
+        while stack:
+            slot, lo, hi, depth = stack.pop()
+            children = self._group_children(words, lo, hi, depth)
+            if not children:
+                continue
+            codes = [code for code, _, _ in children]
+            offset = self._find_base(check, codes, next_free)
+            needed = offset + codes[-1] + 1 - len(check)
+            if needed > 0:
+                # Grow geometrically; unused tail slots are trimmed below
+                needed = max(needed, len(check))
+                base.extend(array('i', bytes(4 * needed)))
+                check.extend(array('i', bytes(4 * needed)))
+                first_code.extend(array('H', [self.NO_CODE]) * needed)
+                next_code.extend(array('H', [self.NO_CODE]) * needed)
+            used = max(used, offset + codes[-1] + 1)
+            base[slot] = offset
+            first_code[slot] = codes[0]
+            for index, (code, child_lo, child_hi) in enumerate(children):
+                child = offset + code
+                check[child] = slot
+                if index + 1 < len(codes):
+                    next_code[child] = codes[index + 1]
+                order.append(child)
+                if code == 0:
+                    base[child] = -(child_lo + 1)
+                else:
+                    stack.append((child, child_lo, child_hi, depth + 1))
+            while next_free < len(check) and check[next_free] != 0:
+                next_free += 1
+        for table in (base, check, first_code, next_code):
+            del table[used:]
+        self.base, self.check = base, check
+        self.first_code, self.next_code = first_code, next_code
+
+        # Subtree word counts and frequency bounds, filled children-first
+        self.counts = array('I', bytes(4 * len(check)))
+        self.max_freq = array('q', bytes(8 * len(check)))
+        for slot in reversed(order):
+            if base[slot] < 0:
+                self.counts[slot] = 1
+                self.max_freq[slot] = self.frequencies[-base[slot] - 1]
+            parent = check[slot]
+            self.counts[parent] += self.counts[slot]
+            if self.max_freq[slot] > self.max_freq[parent]:
+                self.max_freq[parent] = self.max_freq[slot]
+
+    def _group_children(self, words, lo, hi, depth):
+        """(code, lo, hi) ranges of the sorted words below one node"""
+        children = []
+        i = lo
+        if i < hi and len(words[i]) == depth:
+            children.append((0, i, i + 1))
+            i += 1
+        while i < hi:
+            char = words[i][depth]
+            j = i + 1
+            while j < hi and words[j][depth] == char:
+                j += 1
+            children.append((self.codes[char], i, j))
+            i = j
+        return children
+
+    @staticmethod
+    def _find_base(check, codes, next_free):
+        size = len(check)
+        position = max(next_free, codes[0] + 1)
+        while True:
+            if position >= size or check[position] == 0:
+                offset = position - codes[0]
+                if all(offset + code >= size or check[offset + code] == 0 for code in codes[1:]):
+                    return offset
+            position += 1
+
+    def _word(self, word_id):
+        return str(self.arena[self.offsets[word_id]:self.offsets[word_id + 1]], 'utf-8')
+
+    def _walk(self, text):
+        """Slots visited while spelling text, or None if it leaves the trie"""
+        base, check, size = self.base, self.check, len(self.check)
+        slot = self.ROOT
+        path = [slot]
+        for char in text:
+            code = self.codes.get(char)
+            if code is None:
+                return None
+            child = base[slot] + code
+            if child >= size or check[child] != slot:
+                return None
+            slot = child
+            path.append(slot)
+        return path
+
+    def _terminal(self, slot):
+        child = self.base[slot]
+        if 0 <= child < len(self.check) and self.check[child] == slot:
+            return child
+        return None
+
+    def _children(self, slot):
+        base, next_code = self.base[slot], self.next_code
+        code = self.first_code[slot]
+        while code != self.NO_CODE:
+            child = base + code
+            yield code, child
+            code = next_code[child]
+
+    def insert(self, word, frequency=0):
+        path = self._walk(word)
+        terminal = self._terminal(path[-1]) if path else None
+        if terminal is not None:
+            old = self.frequencies[-self.base[terminal] - 1]
+            self._set_frequency(path + [terminal], frequency, frequency < old)
             return
-        if node.word.startswith(prefix):
-            results.append((node.word, node.frequency))
-        self._collect_with_prefix(node.left, prefix, results)
-        self._collect_with_prefix(node.right, prefix, results)
+        self.pending[word] = frequency
+        if len(self.pending) > self.REBUILD_THRESHOLD:
+            self.bulk_load([])
+
+    def increment(self, word, delta=1):
+        if word in self.pending:
+            self.pending[word] += delta
+            return True
+        path = self._walk(word)
+        terminal = self._terminal(path[-1]) if path else None
+        if terminal is None:
+            return False
+        word_id = -self.base[terminal] - 1
+        self._set_frequency(path + [terminal], self.frequencies[word_id] + delta, delta < 0)
+        return True
+
+    def _set_frequency(self, path, frequency, lowered):
+        terminal = path[-1]
+        self.frequencies[-self.base[terminal] - 1] = frequency
+        self.max_freq[terminal] = frequency
+        for slot in reversed(path[:-1]):
+            if lowered:
+                self.max_freq[slot] = max(self.max_freq[child] for code, child in self._children(slot))
+            elif frequency > self.max_freq[slot]:
+                self.max_freq[slot] = frequency
+
+    def get_suggestions(self, prefix, limit=None):
+        ranked = self.iter_suggestions(prefix)
+        return [word for word, freq in itertools.islice(ranked, limit)]
+
+    def iter_suggestions(self, prefix, cursor=None):
+        """Yield (word, frequency) completions in rank order, on demand"""
+        path = self._walk(prefix)
+        ranked = iter(())
+        if path:
+            slot = path[-1]
+            ranked = _ranked_words([(-self.max_freq[slot], prefix, _SUBTREE, 0, slot)], self._expand, cursor)
+        return _merge_pending(ranked, self.pending, prefix, cursor)
+
+    def _expand(self, slot, stem):
+        for code, child in self._children(slot):
+            if code == 0:
+                yield (-self.frequencies[-self.base[child] - 1], stem, _WORD, None)
+            else:
+                yield (-self.max_freq[child], stem + self.chars[code], _SUBTREE, child)
+
+    def count_completions(self, prefix):
+        path = self._walk(prefix)
+        total = self.counts[path[-1]] if path else 0
+        return total + sum(1 for word in self.pending if word.startswith(prefix))
+
+class DAWG:
+    """Minimal word automaton (compiled by dawg.py) with frequencies by rank.
+
+    Suffix sharing means a state cannot hold per-word data, but the words
+    under a prefix form one contiguous rank range. A max segment tree over the
+    rank-ordered frequencies then yields that range's top words best-first.
+    """
+    REBUILD_THRESHOLD = 1024
+
+    def __init__(self, automaton=None, frequencies=None):
+        if automaton is None:
+            automaton, frequencies = compile_dawg([])
+        self._install(automaton, frequencies)
+
+    @classmethod
+    def from_file(cls, path=DAWG_PATH, version=None):
+        """The DAWG compiled by `python dawg.py`, or None if it is missing,
+        corrupt or compiled from another version of the words"""
+        try:
+            return cls(*Automaton.load(path, version))
+        except (OSError, ValueError, EOFError):
+            return None
+
+    def _install(self, automaton, frequencies):
+        self.automaton = automaton
+        self.frequencies = frequencies
+        self.pending = {}
+        size = 1
+        while size < len(frequencies):
+            size *= 2
+        self._size = size
+        tree = array('q', bytes(8 * 2 * size))
+        tree[size:size + len(frequencies)] = frequencies
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._tree = tree
+
+    def __len__(self):
+        return len(self.frequencies) + len(self.pending)
+
+    def bulk_load(self, items):
+        words = dict(self.items())
+        words.update(items)
+        self._install(*compile_dawg(sorted(words.items())))
+
+    def items(self):
+        for rank, frequency in enumerate(self.frequencies):
+            yield self.automaton.word_at(rank), frequency
+        yield from self.pending.items()
+
+    def insert(self, word, frequency=0):
+        rank, present = self.automaton.rank(word)
+        if present:
+            self._set_frequency(rank, frequency)
+            return
+        self.pending[word] = frequency
+        if len(self.pending) > self.REBUILD_THRESHOLD:
+            self.bulk_load([])
+
+    def increment(self, word, delta=1):
+        if word in self.pending:
+            self.pending[word] += delta
+            return True
+        rank, present = self.automaton.rank(word)
+        if not present:
+            return False
+        self._set_frequency(rank, self.frequencies[rank] + delta)
+        return True
+
+    def _set_frequency(self, rank, frequency):
+        self.frequencies[rank] = frequency
+        tree = self._tree
+        node = self._size + rank
+        tree[node] = frequency
+        node //= 2
+        while node:
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+            node //= 2
+
+    def get_suggestions(self, prefix, limit=None):
+        ranked = self.iter_suggestions(prefix)
+        return [word for word, freq in itertools.islice(ranked, limit)]
+
+    def iter_suggestions(self, prefix, cursor=None):
+        """Yield (word, frequency) completions in rank order, on demand"""
+        found = self.automaton.walk(prefix)
+        ranked = iter(())
+        if found:
+            state, lo = found
+            ranked = self._ranked_range(lo, lo + self.automaton.counts[state], cursor)
+        return _merge_pending(ranked, self.pending, prefix, cursor)
+
+    def _ranked_range(self, lo, hi, cursor):
+        # Segment tree nodes are keyed by their leftmost rank, a lower bound
+        # for the ranks inside, which orders ties alphabetically.
+        after = decode_cursor(cursor)
+        if after is not None:
+            rank, present = self.automaton.rank(after[1])
+            after = (after[0], rank if present else rank - 0.5)
+        tree, size = self._tree, self._size
+        heap = []
+        left, right = lo + size, hi + size
+        while left < right:
+            if left & 1:
+                heap.append((-tree[left], self._leftmost(left), left))
+                left += 1
+            if right & 1:
+                right -= 1
+                heap.append((-tree[right], self._leftmost(right), right))
+            left //= 2
+            right //= 2
+        heapq.heapify(heap)
+        while heap:
+            neg_freq, rank, node = heapq.heappop(heap)
+            if node >= size:
+                if after is None or (neg_freq, rank) > after:
+                    yield self.automaton.word_at(rank), -neg_freq
+                continue
+            for child in (2 * node, 2 * node + 1):
+                heapq.heappush(heap, (-tree[child], self._leftmost(child), child))
+
+    def _leftmost(self, node):
+        while node < self._size:
+            node *= 2
+        return node - self._size
+
+    def count_completions(self, prefix):
+        found = self.automaton.walk(prefix)
+        total = self.automaton.counts[found[0]] if found else 0
+        return total + sum(1 for word in self.pending if word.startswith(prefix))
+
+class SortedArrayIndex:
+    """Sorted word array with a parallel NumPy frequency array.
+
+    A prefix owns the contiguous slice [lo, hi) found by bisect, and its top
+    k comes from numpy.argpartition over that frequency slice, so broad
+    prefixes cost one vectorized pass instead of a pointer-chasing walk.
+    """
+    FIRST_BATCH = 16
+
+    def __init__(self):
+        self.words = np.empty(0, dtype=object)
+        self.frequencies = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.words)
+
+    def bulk_load(self, items):
+        """Vectorized merge of (word, frequency) pairs into the sorted arrays"""
+        updates = dict(items)
+        if not updates:
+            return
+        new_words = np.array(sorted(updates), dtype=object)
+        new_freqs = np.array([updates[word] for word in new_words], dtype=np.int64)
+        positions = np.searchsorted(self.words, new_words)
+        existing = np.zeros(len(new_words), dtype=bool)
+        if len(self.words):
+            clipped = np.minimum(positions, len(self.words) - 1)
+            existing = (positions < len(self.words)) & (self.words[clipped] == new_words)
+        self.frequencies[positions[existing]] = new_freqs[existing]
+        fresh = ~existing
+        self.words = np.insert(self.words, positions[fresh], new_words[fresh])
+        self.frequencies = np.insert(self.frequencies, positions[fresh], new_freqs[fresh])
+
+    def items(self):
+        return zip(self.words.tolist(), self.frequencies.tolist())
+
+    def _index(self, word):
+        index = bisect.bisect_left(self.words, word)
+        if index < len(self.words) and self.words[index] == word:
+            return index
+        return None
+
+    def insert(self, word, frequency=0):
+        index = self._index(word)
+        if index is not None:
+            self.frequencies[index] = frequency
+        else:
+            self.bulk_load([(word, frequency)])
+
+    def increment(self, word, delta=1):
+        index = self._index(word)
+        if index is None:
+            return False
+        self.frequencies[index] += delta
+        return True
+
+    def _range(self, prefix):
+        lo = bisect.bisect_left(self.words, prefix)
+        upper = _prefix_upper_bound(prefix)
+        hi = bisect.bisect_left(self.words, upper, lo) if upper else len(self.words)
+        return lo, hi
+
+    def _top(self, lo, hi, k, after=None):
+        """Indices of the k best-ranked words in [lo, hi) that rank after `after`"""
+        freqs = self.frequencies[lo:hi]
+        candidates = np.arange(len(freqs))
+        if after is not None:
+            after_freq, after_word = -after[0], after[1]
+            after_index = bisect.bisect_right(self.words, after_word, lo, hi) - lo
+            keep = (freqs < after_freq) | ((freqs == after_freq) & (candidates >= after_index))
+            candidates = candidates[keep]
+        if k < len(candidates):
+            cand_freqs = freqs[candidates]
+            kth = cand_freqs[np.argpartition(-cand_freqs, k - 1)[k - 1]]
+            # Everything above the k-th frequency, then the alphabetically
+            # first of the words tied with it
+            above = candidates[cand_freqs > kth]
+            tied = candidates[cand_freqs == kth][:k - len(above)]
+            candidates = np.concatenate((above, tied))
+        order = np.lexsort((candidates, -freqs[candidates]))
+        return candidates[order] + lo
+
+    def get_suggestions(self, prefix, limit=None):
+        ranked = self.iter_suggestions(prefix)
+        return [word for word, freq in itertools.islice(ranked, limit)]
+
+    def iter_suggestions(self, prefix, cursor=None):
+        """Yield (word, frequency) completions in rank order, on demand"""
+        lo, hi = self._range(prefix)
+        return self._ranked(lo, hi, decode_cursor(cursor))
+
+    def _ranked(self, lo, hi, after):
+        # Fetch growing batches so a short listing stays a single partition
+        batch = self.FIRST_BATCH
+        while True:
+            picked = self._top(lo, hi, batch, after)
+            for index in picked:
+                yield self.words[index], int(self.frequencies[index])
+            if len(picked) < batch:
+                return
+            last = picked[-1]
+            after = (-int(self.frequencies[last]), self.words[last])
+            batch *= 4
+
+    def count_completions(self, prefix):
+        lo, hi = self._range(prefix)
+        return hi - lo
 
 # Performance Monitor
 class PerformanceMonitor:
     def __init__(self):
         self.metrics = []
+        self.writer = BufferedWriter(insert_metrics)
+        self._lock = threading.Lock()
+        self.prefix_filter = {}
+        self.prefix_checks = 0
+        self.prefix_rejections = 0
+        self.prefix_false_positives = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+        self.cache_rejections = 0
+        self.latency = LatencyHistograms()
+        self.latency.load(get_database().read('''
+            SELECT a.name, o.name, h.bucket, h.count
+            FROM latency_histograms h
+            JOIN algorithms a ON a.id = h.algorithm_id
+            JOIN operations o ON o.id = h.operation_id
+        '''))
+        self._next_persist = time.monotonic() + LATENCY_PERSIST_INTERVAL
+        atexit.register(self.persist_latency)
+
+    def describe_prefix_filter(self, prefix_filter):
+        self.prefix_filter = {
+            'kind': 'exact' if prefix_filter.kind == PrefixFilter.EXACT else 'xor',
+            'bytes': prefix_filter.nbytes,
+            'expected_fpr': prefix_filter.expected_fpr,
+        }
+
+    def record_prefix_check(self, rejected, found=True):
+        """Count one prefix-filter pre-check; found is whether the engine had completions"""
+        with self._lock:
+            self.prefix_checks += 1
+            if rejected:
+                self.prefix_rejections += 1
+            elif not found:
+                self.prefix_false_positives += 1
+
+    def prefix_filter_stats(self):
+        # The filter has no false negatives, so every rejection is a true negative
+        negatives = self.prefix_false_positives + self.prefix_rejections
+        return dict(
+            self.prefix_filter,
+            checks=self.prefix_checks,
+            rejection_rate=self.prefix_rejections / self.prefix_checks if self.prefix_checks else 0.0,
+            false_positive_rate=self.prefix_false_positives / negatives if negatives else 0.0,
+        )
+
+    def record_cache_lookup(self, hit):
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def record_cache_put(self, evicted):
+        """Count one result offered to the cache; evicted is None if it was not admitted"""
+        with self._lock:
+            if evicted is None:
+                self.cache_rejections += 1
+            else:
+                self.cache_evictions += evicted
+
+    def result_cache_stats(self, cache):
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            'entries': len(cache),
+            'bytes': cache.size,
+            'capacity': cache.capacity,
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'hit_rate': self.cache_hits / lookups if lookups else 0.0,
+            'evictions': self.cache_evictions,
+            'rejections': self.cache_rejections,
+        }
 
     def measure_operation(self, algorithm, operation, func):
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         result = func()
-        end_time = time.time()
-        execution_time = end_time - start_time
+        elapsed = time.perf_counter_ns() - start_time
+        execution_time = elapsed / 1e9
         
-        # Store in database
-        conn = sqlite3.connect('autocomplete.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO performance_metrics (algorithm, operation, execution_time)
-            VALUES (?, ?, ?)
-        ''', (algorithm, operation, execution_time))
-        conn.commit()
-        conn.close()
+        # Written in batches by a background thread
+        self.writer.add((algorithm, operation, execution_time))
+        self.latency.record(algorithm, operation, elapsed)
+        if time.monotonic() >= self._next_persist:
+            self.persist_latency()
         
         return result, execution_time
 
+    def persist_latency(self):
+        """Add the bucket counts recorded since the last call to the database"""
+        self._next_persist = time.monotonic() + LATENCY_PERSIST_INTERVAL
+        rows = self.latency.take_pending()
+        if rows:
+            get_database().run(lambda conn: self._persist_latency(conn, rows), wait=False)
+
+    @staticmethod
+    def _persist_latency(conn, rows):
+        ensure_names(conn, 'algorithms', [row[0] for row in rows])
+        ensure_names(conn, 'operations', [row[1] for row in rows])
+        conn.executemany(f'''
+            INSERT INTO latency_histograms (algorithm_id, operation_id, bucket, count)
+            VALUES ({name_id('algorithms')}, {name_id('operations')}, ?, ?)
+            ON CONFLICT (algorithm_id, operation_id, bucket) DO UPDATE SET count = count + excluded.count
+        ''', rows)
+
+    def latency_percentiles(self, prefix='autocomplete_'):
+        """Percentiles in milliseconds per algorithm, over operations starting with prefix"""
+        return pd.DataFrame([
+            dict({f'p{q:g}': value / 1e6 for q, value in histogram.percentiles().items()},
+                 algorithm=algorithm, samples=histogram.total)
+            for algorithm, histogram in sorted(self.latency.by_algorithm(prefix).items())
+        ])
+
+    def latency_by_prefix_length(self, q):
+        """Percentile q in milliseconds for each algorithm and prefix length"""
+        rows = [
+            {'algorithm': algorithm, 'prefix_length': int(operation.rsplit('_', 1)[1]),
+             'latency_ms': histogram.percentile(q) / 1e6}
+            for (algorithm, operation), histogram in self.latency.snapshot().items()
+            if operation.startswith('autocomplete_')
+        ]
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows).pivot(index='algorithm', columns='prefix_length', values='latency_ms')
+
 # Database Operations
 class DatabaseManager:
     @staticmethod
     def load_words():
-        conn = sqlite3.connect('autocomplete.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT word, frequency FROM words')
-        words = dict(cursor.fetchall())
-        conn.close()
-        return words
+        return dict(get_database().read('SELECT word, frequency FROM words'))
+
+    @staticmethod
+    def words_version():
+        with get_database().reader() as conn:
+            return words_version(conn)
 
     @staticmethod
     def save_word(word, frequency=0, category='general', language='en'):
-        conn = sqlite3.connect('autocomplete.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT OR REPLACE INTO words (word, frequency, category, language)
-            VALUES (?, ?, ?, ?)
-        ''', (word, frequency, category, language))
-        conn.commit()
-        conn.close()
+        get_database().run(lambda conn: insert_words(
+            conn, [(word, frequency, category, language)], replace=True), wait=False)
 
     @staticmethod
-    def update_frequency(word):
-        conn = sqlite3.connect('autocomplete.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE words SET frequency = frequency + 1 WHERE word = ?
-        ''', (word,))
-        conn.commit()
-        conn.close()
+    def save_words(words, category='general', language='en'):
+        rows = [(word, 0, category, language) for word in words]
+        get_database().run(lambda conn: insert_words(conn, rows))
 
     @staticmethod
     def save_search(prefix, suggestions, selected_word, algorithm, search_time):
-        conn = sqlite3.connect('autocomplete.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO search_history (prefix, suggestions, selected_word, algorithm, search_time)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (prefix, json.dumps(suggestions), selected_word, algorithm, search_time))
-        conn.commit()
-        conn.close()
+        get_history().add(prefix, suggestions, selected_word, algorithm, search_time)
 
     @staticmethod
     def get_search_history(limit=50):
-        conn = sqlite3.connect('autocomplete.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT prefix, selected_word, algorithm, search_time, timestamp 
-            FROM search_history 
-            ORDER BY timestamp DESC 
-            LIMIT ?
-        ''', (limit,))
-        history = cursor.fetchall()
-        conn.close()
-        return history
+        return [
+            (prefix, selected_word, algorithm, search_time, timestamp)
+            for prefix, suggestions, selected_word, algorithm, search_time, timestamp
+            in get_history().recent(limit)
+        ]
 
     @staticmethod
     def get_performance_data():
-        conn = sqlite3.connect('autocomplete.db')
-        df = pd.read_sql_query('''
-            SELECT algorithm, operation, execution_time, timestamp 
-            FROM performance_metrics 
-            ORDER BY timestamp DESC 
+        # Reused across reruns until new metrics are written
+        return get_frame_cache().get('performance_metrics', '''
+            SELECT a.name AS algorithm, o.name AS operation, m.execution_time, m.timestamp 
+            FROM performance_metrics m
+            JOIN algorithms a ON a.id = m.algorithm_id
+            JOIN operations o ON o.id = m.operation_id
+            ORDER BY m.id DESC 
             LIMIT 100
-        ''', conn)
+        ''')
+
+# Engines offered in the sidebar; each is built the first time it is requested
+ENGINE_FACTORIES = {
+    'Trie': lambda: Trie(top_k=MAX_SUGGESTIONS),
+    'TST': TernarySearchTree,
+    'BST': BinarySearchTree,
+    'Radix': RadixTree,
+    'DoubleArrayTrie': DoubleArrayTrie,
+    'DAWG': DAWG,
+    'SortedArray': SortedArrayIndex
+}
+# Engines that can load a file compiled offline for a given words version
+ENGINE_FILES = {
+    'DAWG': lambda version: DAWG.from_file(DAWG_PATH, version),
+}
+
+# Build requested engines on a worker thread, answering from built ones meanwhile
+BACKGROUND_BUILD = True
+# Seconds an engine may go unused before its memory is released (None keeps all)
+ENGINE_IDLE_TIMEOUT = 900
+LATENCY_PERSIST_INTERVAL = 30  # Seconds between latency histogram writes
+# Selections reach the engines at once and the database every few seconds;
+# 'journal' also appends each one to autocomplete.freq.journal so a crash
+# loses none of them
+FREQUENCY_DURABILITY = 'interval'
+# Memory for cached query results; admission keeps the most popular prefixes
+RESULT_CACHE_BYTES = 4 << 20
+
+# Word-list imports
+IMPORT_CHUNK_SIZE = 1 << 20  # Bytes decoded per step
+BULK_MERGE_MIN = 1024  # Batches at least this large are merged with bulk_load
+
+def normalize_word(line):
+    return unicodedata.normalize('NFC', line).strip().lower()
+
+def iter_line_chunks(stream, chunk_size=IMPORT_CHUNK_SIZE):
+    """Yield (lines, bytes read so far) for each chunk of a binary stream"""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    tail, done = '', 0
+    while True:
+        chunk = stream.read(chunk_size)
+        done += len(chunk)
+        lines = (tail + decoder.decode(chunk, final=not chunk)).split('\n')
+        # The last piece may continue in the next chunk
+        tail = lines.pop() if chunk else ''
+        yield lines, done
+        if not chunk:
+            return
+
+def compile_snapshot(db_path='autocomplete.db', path=SNAPSHOT_PATH):
+    """Write the DoubleArrayTrie and prefix filter of the words table to path"""
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_change_counter(conn)
+        conn.commit()
+        # Read the counter and the words in one transaction so they agree
+        conn.execute('BEGIN')
+        version = words_version(conn)
+        items = conn.execute('SELECT word, frequency FROM words').fetchall()
+        conn.rollback()
+    finally:
         conn.close()
-        return df
+
+    trie = DoubleArrayTrie()
+    trie.bulk_load(items)
+    prefix_filter = PrefixFilter.build([word for word, frequency in items])
+    write_snapshot(path, dict(trie.tables(), **prefix_filter.tables()), version)
+    return len(items)
+
+# Engine state: one complete copy of the in-memory search structures
+class EngineState:
+    def __init__(self, words=None, snapshot=None):
+        self.snapshot = snapshot
+        self.algorithms = {}
+        # Words version these engines were loaded at, until the first change
+        self.version = None if snapshot is None else snapshot.version
+        if snapshot is None:
+            self._words = dict(words)
+            self.prefix_filter = PrefixFilter.build(self._words)
+        else:
+            # Mapped straight from the file; pages load as queries touch them
+            tables = snapshot.tables()
+            self._words = None
+            self.algorithms['DoubleArrayTrie'] = DoubleArrayTrie.from_tables(tables)
+            self.prefix_filter = PrefixFilter.from_tables(tables)
+
+    @property
+    def words(self):
+        """word -> frequency, decoded from the snapshot on first use"""
+        if self._words is None:
+            self._words = dict(DoubleArrayTrie.from_tables(self.snapshot.tables()).items())
+        return self._words
+
+    def source(self):
+        """What create() builds from: a copy of the words and their version"""
+        return dict(self.words), self.version
+
+    def create(self, name, source):
+        """A new engine over the source words; runs outside the write lock"""
+        words, version = source
+        loader = ENGINE_FILES.get(name)
+        algorithm = loader(version) if loader and version is not None else None
+        if algorithm is None:
+            algorithm = ENGINE_FACTORIES[name]()
+            if hasattr(algorithm, 'bulk_load'):
+                algorithm.bulk_load(words.items())
+            else:
+                for word, frequency in words.items():
+                    algorithm.insert(word, frequency)
+        return algorithm
+
+    def install(self, name, algorithm, source):
+        if name not in self.algorithms:
+            catch_up(algorithm, source[0], self.words)
+            self.algorithms[name] = algorithm
+
+    def release(self, name):
+        self.algorithms.pop(name, None)
+
+    def __contains__(self, word):
+        # Exact membership; the prefix filter also matches mere prefixes
+        return word in self.words
+
+    def add_words(self, words):
+        """Insert the words not already present; returns them in input order"""
+        added = []
+        for word in words:
+            if word not in self.words:
+                self.words[word] = 0
+                added.append(word)
+        if added:
+            self.version = None
+        bulk = len(added) >= BULK_MERGE_MIN
+        for algorithm in self.algorithms.values():
+            if bulk and hasattr(algorithm, 'bulk_load'):
+                # One rebuild instead of one per REBUILD_THRESHOLD pending words
+                algorithm.bulk_load((word, 0) for word in added)
+            else:
+                for word in added:
+                    algorithm.insert(word)
+        if bulk:
+            # Resized for the new prefix count rather than growing its side set
+            self.prefix_filter = PrefixFilter.build(self.words)
+        else:
+            for word in added:
+                self.prefix_filter.add(word)
+        return added
+
+    def increment(self, word, delta=1):
+        self.version = None
+        if word in self.words:
+            self.words[word] += delta
+        for algorithm in self.algorithms.values():
+            # Structures with in-place updates keep their rankings current
+            if hasattr(algorithm, 'increment'):
+                algorithm.increment(word, delta)
 
 # Enhanced Autocomplete System
 class EnhancedAutoCompleteSystem:
+    """Autocomplete service shared by every session of the process.
+
+    Queries read the published EngineState without locking; add_word and
+    select_word go through SnapshotSwap.write so they never block a query.
+    Engines are built lazily by a LazyBuilder. Frequency increments reach
+    the database through a write-behind FrequencyBuffer. First pages of
+    results are kept in a ResultCache; a changed word invalidates only the
+    entries for its own prefixes.
+    """
     def __init__(self):
         self.monitor = PerformanceMonitor()
         self.db_manager = DatabaseManager()
-        self.algorithms = {
-            'Trie': Trie(),
-            'TST': TernarySearchTree(),
-            'BST': BinarySearchTree()
-        }
-        self.bloom_filter = BloomFilter(capacity=100000, error_rate=0.01)
+        self.results = ResultCache(RESULT_CACHE_BYTES)
+        # Created first: in journal mode it replays increments a crash left behind
+        self.frequencies = FrequencyBuffer(durability=FREQUENCY_DURABILITY)
         self.load_data()
 
     def load_data(self):
-        words = self.db_manager.load_words()
-        for word, frequency in words.items():
-            for algorithm in self.algorithms.values():
-                algorithm.insert(word, frequency)
-            for i in range(1, len(word) + 1):
-                self.bloom_filter.add(word[:i])
-
-    def get_suggestions(self, prefix, algorithm='Trie'):
-        if prefix not in self.bloom_filter:
+        snapshot = open_snapshot(SNAPSHOT_PATH, self.db_manager.words_version())
+        if snapshot is None:
+            # Missing, corrupt or older than the words table: rebuild it
+            try:
+                compile_snapshot(path=SNAPSHOT_PATH)
+                snapshot = open_snapshot(SNAPSHOT_PATH, self.db_manager.words_version())
+            except OSError:
+                snapshot = None
+        if snapshot is None:
+            words = self.db_manager.load_words()
+            states = EngineState(words), EngineState(words)
+        else:
+            states = EngineState(snapshot=snapshot), EngineState(snapshot=snapshot)
+        self.state = SnapshotSwap(*states)
+        self._describe_prefix_filter()
+        self.builder = LazyBuilder(self.state, BACKGROUND_BUILD, ENGINE_IDLE_TIMEOUT)
+
+    def _describe_prefix_filter(self):
+        # Called whenever added words may have grown or rebuilt the filter
+        with self.state.read() as state:
+            self.monitor.describe_prefix_filter(state.prefix_filter)
+
+    def is_built(self, algorithm):
+        return algorithm in self.builder.built()
+
+    def _may_match(self, prefix):
+        with self.state.read() as state:
+            return prefix in state.prefix_filter
+
+    def _cache_get(self, key):
+        """(cached value or None, epoch for _cache_put)"""
+        value, epoch = self.results.get(key)
+        self.monitor.record_cache_lookup(hit=value is not None)
+        return value, epoch
+
+    def _cache_put(self, key, value, epoch):
+        self.monitor.record_cache_put(self.results.put(key, value, epoch))
+
+    def _query(self, engine, algorithm, query):
+        """(engine name, query(engine)) on the engine resolve() picked.
+
+        An idle release may publish a state without that engine before the
+        read starts; the query is then re-resolved once instead of failing.
+        """
+        with self.state.read() as state:
+            found = state.algorithms.get(engine)
+            if found is not None:
+                return engine, query(found)
+        engine = self.builder.resolve(algorithm)
+        with self.state.read() as state:
+            return engine, query(state.algorithms[engine])
+
+    def get_suggestions(self, prefix, algorithm='Trie', limit=None):
+        if not self._may_match(prefix):
+            self.monitor.record_prefix_check(rejected=True)
             return [], 0.0
 
-        alg = self.algorithms[algorithm]
-        suggestions, exec_time = self.monitor.measure_operation(
-            algorithm, f'autocomplete_{len(prefix)}', 
-            lambda: alg.get_suggestions(prefix)
+        engine = self.builder.resolve(algorithm)
+        # Cache hits report the lookup time and are left out of the engine metrics
+        start = time.perf_counter()
+        key = (prefix, engine, 'all', limit)
+        cached, epoch = self._cache_get(key)
+        if cached is not None:
+            self.monitor.record_prefix_check(rejected=False, found=bool(cached))
+            return list(cached), time.perf_counter() - start
+
+        def search():
+            return self._query(engine, algorithm, lambda found: found.get_suggestions(prefix, limit))
+
+        (engine, suggestions), exec_time = self.monitor.measure_operation(
+            engine, f'autocomplete_{len(prefix)}', search
         )
+        self.monitor.record_prefix_check(rejected=False, found=bool(suggestions))
+        self._cache_put((prefix, engine, 'all', limit), tuple(suggestions), epoch)
         
         return suggestions, exec_time
 
-    def select_word(self, word, prefix, algorithm, exec_time):
-        self.db_manager.update_frequency(word)
-        
-        # Update all algorithms
-        for alg in self.algorithms.values():
-            if hasattr(alg, 'root'):
-                self._update_frequency_in_structure(alg, word)
-        
-        self.db_manager.save_search(prefix, [], word, algorithm, exec_time)
+    def get_suggestion_page(self, prefix, algorithm='Trie', limit=MAX_SUGGESTIONS, cursor=None):
+        """One page of ranked suggestions plus the cursor for the next page"""
+        if not self._may_match(prefix):
+            if cursor is None:
+                self.monitor.record_prefix_check(rejected=True)
+            return [], None, 0.0
+
+        engine = self.builder.resolve(algorithm)
+        # Only first pages are cached; later ones are rarely requested twice
+        start = time.perf_counter()
+        key = (prefix, engine, 'page', limit)
+        page, epoch = self._cache_get(key) if cursor is None else (None, None)
+
+        def page_of(found):
+            # First pages come straight from the Trie's ranked lists
+            if cursor is None and hasattr(found, 'first_page'):
+                return found.first_page(prefix, limit)
+            ranked = list(itertools.islice(found.iter_suggestions(prefix, cursor), limit + 1))
+            return ranked[:limit], len(ranked) > limit
+
+        def search():
+            return self._query(engine, algorithm, page_of)
+
+        if page is not None:
+            exec_time = time.perf_counter() - start
+        else:
+            (engine, page), exec_time = self.monitor.measure_operation(
+                engine, f'autocomplete_{len(prefix)}', search
+            )
+            if cursor is None:
+                self._cache_put((prefix, engine, 'page', limit), (tuple(page[0]), page[1]), epoch)
+        ranked, more = page
+        if cursor is None:
+            self.monitor.record_prefix_check(rejected=False, found=bool(ranked))
+        next_cursor = encode_cursor(*ranked[-1]) if more else None
+        return [word for word, freq in ranked], next_cursor, exec_time
 
-    def _update_frequency_in_structure(self, structure, word):
-        # This is a simplified update - in production, you'd want to properly update frequencies
-        pass
+    def count_completions(self, prefix, algorithm='Trie'):
+        if not self._may_match(prefix):
+            return 0
+        engine = self.builder.resolve(algorithm)
+        return self._query(engine, algorithm, lambda found: found.count_completions(prefix))[1]
+
+    def select_word(self, word, prefix, algorithm, exec_time, suggestions=()):
+        self.state.write(lambda state: state.increment(word))
+        self.results.invalidate([word])
+        self.frequencies.add(word)
+        self.db_manager.save_search(prefix, suggestions, word, algorithm, exec_time)
 
     def add_word(self, word, category='general', language='en'):
-        if word not in self.bloom_filter:
-            for algorithm in self.algorithms.values():
-                algorithm.insert(word)
-            for i in range(1, len(word) + 1):
-                self.bloom_filter.add(word[:i])
-            self.db_manager.save_word(word, 0, category, language)
+        return bool(self.add_words([word], category, language))
+
+    def add_words(self, words, category='general', language='en'):
+        """Add new words, deduplicated in memory; returns the ones added"""
+        added = self.state.write(lambda state: state.add_words(words))
+        if added:
+            self.results.invalidate(added)
+            self._describe_prefix_filter()
+            self.db_manager.save_words(added, category, language)
+        return added
+
+    def import_words(self, stream, category='general', language='en', total_bytes=None, progress=None):
+        """Stream a one-word-per-line file into the dictionary.
+
+        Lines are decoded, normalized and deduplicated chunk by chunk; the
+        new words are written with one executemany on the writer thread and
+        the engines merge them in one snapshot-swap write. progress is
+        called as progress(bytes_read, total_bytes, new_words, words_per_sec).
+        Returns (words added, lines processed, seconds).
+        """
+        start = time.perf_counter()
+        seen, fresh, processed = set(), [], 0
+        for lines, done in iter_line_chunks(stream):
+            batch = []
+            for line in lines:
+                word = normalize_word(line)
+                if word and word not in seen:
+                    seen.add(word)
+                    batch.append(word)
+            processed += len(lines)
+            with self.state.read() as state:
+                fresh.extend(word for word in batch if word not in state)
+            if progress:
+                elapsed = time.perf_counter() - start
+                progress(done, total_bytes, len(fresh), processed / elapsed if elapsed else 0.0)
+        self.db_manager.save_words(fresh, category, language)
+        added = self.state.write(lambda state: state.add_words(fresh))
+        self.results.invalidate(added)
+        self._describe_prefix_filter()
+        return added, processed, time.perf_counter() - start
+
+@st.cache_resource
+def get_shared_system():
+    """One autocomplete system per process, shared by all browser sessions"""
+    init_database()
+    return EnhancedAutoCompleteSystem()
 
 # Streamlit UI
 def main():
@@ -361,12 +1687,9 @@ def main():
         initial_sidebar_state="expanded"
     )
     
-    # Initialize database
-    init_database()
-    
-    # Initialize system
-    if 'system' not in st.session_state:
-        st.session_state.system = EnhancedAutoCompleteSystem()
+    # Initialize system; this also creates the tables, once per process
+    system = get_shared_system()
+    if 'current_prefix' not in st.session_state:
         st.session_state.search_history = []
         st.session_state.current_prefix = ""
     
@@ -400,7 +1723,7 @@ def main():
         # Algorithm selection
         algorithm = st.selectbox(
             "Choose Algorithm",
-            options=['Trie', 'TST', 'BST'],
+            options=list(ENGINE_FACTORIES),
             index=0,
             help="Select the data structure for autocomplete"
         )
@@ -410,18 +1733,37 @@ def main():
         
         # Performance tracking
         st.subheader("📊 Performance")
-        perf_data = DatabaseManager.get_performance_data()
-        if not perf_data.empty:
-            avg_time = perf_data['execution_time'].mean()
-            st.metric("Avg Response Time", f"{avg_time:.4f}s")
+        filter_stats = system.monitor.prefix_filter_stats()
+        st.metric("Prefix filter rejections", f"{filter_stats['rejection_rate']:.1%}")
+        st.caption(
+            f"{filter_stats['kind']} filter, {filter_stats['bytes'] / 1024:.0f} KiB; "
+            f"false positives {filter_stats['false_positive_rate']:.2%} observed, "
+            f"{filter_stats['expected_fpr']:.2%} expected over {filter_stats['checks']} checks"
+        )
+        cache_stats = system.monitor.result_cache_stats(system.results)
+        st.metric("Result cache hits", f"{cache_stats['hit_rate']:.1%}")
+        st.caption(
+            f"{cache_stats['entries']} entries, {cache_stats['bytes'] / 1024:.0f} of "
+            f"{cache_stats['capacity'] / 1024:.0f} KiB; {cache_stats['evictions']} evicted, "
+            f"{cache_stats['rejections']} not admitted"
+        )
+        latency = system.monitor.latency_percentiles()
+        if not latency.empty:
+            selected = latency[latency['algorithm'] == algorithm]
+            if not selected.empty:
+                st.metric("p50 / p99 Response Time",
+                          f"{selected['p50'].iloc[0]:.3f} / {selected['p99'].iloc[0]:.3f} ms")
             
-            # Algorithm performance comparison
-            alg_perf = perf_data.groupby('algorithm')['execution_time'].mean()
+            # Algorithm tail latency comparison
             fig = px.bar(
-                x=alg_perf.index, 
-                y=alg_perf.values,
-                title="Algorithm Performance",
-                labels={'x': 'Algorithm', 'y': 'Avg Time (s)'}
+                latency.melt(id_vars='algorithm', value_vars=[f'p{q:g}' for q in PERCENTILES],
+                             var_name='percentile', value_name='ms'),
+                x='algorithm',
+                y='ms',
+                color='percentile',
+                barmode='group',
+                title="Algorithm Latency Percentiles",
+                labels={'algorithm': 'Algorithm', 'ms': 'Latency (ms)'}
             )
             st.plotly_chart(fig, use_container_width=True)
     
@@ -443,22 +1785,43 @@ def main():
             prefix = st.text_input("Type your prefix:", key="search_input")
         
         if prefix:
-            suggestions, exec_time = st.session_state.system.get_suggestions(prefix, algorithm)
+            # Reset "load more" paging whenever the query changes
+            if st.session_state.get('page_query') != (prefix, algorithm):
+                st.session_state.page_query = (prefix, algorithm)
+                st.session_state.more_suggestions = []
+                st.session_state.next_cursor = None
+
+            suggestions, next_cursor, exec_time = system.get_suggestion_page(prefix, algorithm)
+            if st.session_state.more_suggestions:
+                suggestions = suggestions + st.session_state.more_suggestions
+                next_cursor = st.session_state.next_cursor
+            total = system.count_completions(prefix, algorithm)
             
             # Performance metrics
-            st.info(f"⚡ Found {len(suggestions)} suggestions in {exec_time:.6f}s using {algorithm}")
+            st.info(f"⚡ Found {total} suggestions in {exec_time:.6f}s using {algorithm}")
+            if not system.is_built(algorithm):
+                st.caption(f"⏳ {algorithm} is still being built; these results come from an engine that is ready.")
             
             if suggestions:
                 st.subheader(f"💡 Suggestions for '{prefix}'")
                 
                 # Display suggestions as interactive buttons
                 cols = st.columns(min(3, len(suggestions)))
-                for i, word in enumerate(suggestions[:9]):  # Show top 9
+                for i, word in enumerate(suggestions):
                     with cols[i % 3]:
                         if st.button(f"{word}", key=f"suggestion_{i}"):
-                            st.session_state.system.select_word(word, prefix, algorithm, exec_time)
+                            system.select_word(word, prefix, algorithm, exec_time, suggestions)
+                            st.session_state.page_query = None
                             st.success(f"✅ Selected: '{word}'")
                             st.rerun()
+
+                if next_cursor and st.button("Load more", key="load_more"):
+                    page, page_cursor, _ = system.get_suggestion_page(
+                        prefix, algorithm, cursor=next_cursor
+                    )
+                    st.session_state.more_suggestions += page
+                    st.session_state.next_cursor = page_cursor
+                    st.rerun()
             else:
                 st.warning("No suggestions found for this prefix.")
     
@@ -488,22 +1851,35 @@ def main():
         word_language = st.selectbox("Language:", ["en", "es", "fr", "de"])
         
         if st.button("Add Word"):
-            if new_word:
-                st.session_state.system.add_word(new_word, word_category, word_language)
+            if new_word and system.add_word(new_word, word_category, word_language):
                 st.success(f"✅ Added '{new_word}' to dictionary!")
                 st.rerun()
+            elif new_word:
+                st.info(f"'{new_word}' is already in the dictionary.")
     
     with col_import:
         st.subheader("📂 Import/Export")
         
         # Import functionality
         uploaded_file = st.file_uploader("Upload word list (.txt)", type=['txt'])
-        if uploaded_file:
-            content = uploaded_file.read().decode()
-            words = [word.strip() for word in content.split('\n') if word.strip()]
-            for word in words:
-                st.session_state.system.add_word(word)
-            st.success(f"✅ Imported {len(words)} words!")
+        # Reruns keep the uploaded file, so import each upload only once
+        if uploaded_file and st.session_state.get('imported_file') != uploaded_file.file_id:
+            bar = st.progress(0.0, text="Importing...")
+
+            def report(done, total, new_words, rate):
+                bar.progress(
+                    min(done / total, 1.0) if total else 1.0,
+                    text=f"{done / 1e6:.1f} / {total / 1e6:.1f} MB · {new_words:,} new words · {rate:,.0f} words/s"
+                )
+
+            added, processed, elapsed = system.import_words(
+                uploaded_file, total_bytes=uploaded_file.size, progress=report
+            )
+            st.session_state.imported_file = uploaded_file.file_id
+            st.success(
+                f"✅ Imported {len(added):,} new words from {processed:,} lines in {elapsed:.1f}s "
+                f"({processed / max(elapsed, 1e-9):,.0f} words/s)"
+            )
         
         # Export functionality
         if st.button("Export Dictionary"):
@@ -521,10 +1897,10 @@ def main():
     
     # Performance comparison dashboard
     perf_df = DatabaseManager.get_performance_data()
-    if not perf_df.empty:
-        col_perf1, col_perf2 = st.columns(2)
-        
-        with col_perf1:
+    col_perf1, col_perf2 = st.columns(2)
+    
+    with col_perf1:
+        if not perf_df.empty:
             # Time series performance
             fig_time = px.line(
                 perf_df, 
@@ -534,63 +1910,49 @@ def main():
                 title="Performance Over Time"
             )
             st.plotly_chart(fig_time, use_container_width=True)
-        
-        with col_perf2:
-            # Operation type analysis
-            fig_ops = px.box(
-                perf_df, 
-                x='operation', 
-                y='execution_time', 
-                color='algorithm',
-                title="Operation Performance Distribution"
-            )
-            st.plotly_chart(fig_ops, use_container_width=True)
     
-    # Database statistics
-    conn = sqlite3.connect('autocomplete.db')
-    
-    # Word statistics
-    word_stats = pd.read_sql_query('''
-        SELECT 
-            COUNT(*) as total_words,
-            SUM(frequency) as total_searches,
-            AVG(frequency) as avg_frequency,
-            COUNT(DISTINCT category) as categories,
-            COUNT(DISTINCT language) as languages
-        FROM words
-    ''', conn)
+    with col_perf2:
+        # Latency by prefix length, from the histograms; independent of the
+        # raw metric rows above
+        percentile = st.radio("Percentile", PERCENTILES, index=2, horizontal=True,
+                              format_func=lambda q: f"p{q:g}")
+        heatmap = system.monitor.latency_by_prefix_length(percentile)
+        if not heatmap.empty:
+            fig_heat = px.imshow(
+                heatmap,
+                aspect='auto',
+                color_continuous_scale='Viridis',
+                labels={'x': 'Prefix length', 'y': 'Algorithm', 'color': 'ms'},
+                title=f"p{percentile:g} Latency by Prefix Length"
+            )
+            st.plotly_chart(fig_heat, use_container_width=True)
     
-    # Search statistics
-    search_stats = pd.read_sql_query('''
-        SELECT 
-            COUNT(*) as total_searches,
-            COUNT(DISTINCT prefix) as unique_prefixes,
-            AVG(search_time) as avg_search_time,
-            COUNT(DISTINCT algorithm) as algorithms_used
-        FROM search_history
-    ''', conn)
+    latency = system.monitor.latency_percentiles()
+    if not latency.empty:
+        st.dataframe(latency.set_index('algorithm').round(4), use_container_width=True)
     
-    conn.close()
+    # Database statistics, maintained incrementally by triggers (catalog.py)
+    stats = read_stats()
+    words_total = stats.get('words') or 0
+    searches_total = stats.get('searches') or 0
     
     # Display statistics
     col_stats1, col_stats2 = st.columns(2)
     
     with col_stats1:
         st.subheader("📊 Dictionary Statistics")
-        stats = word_stats.iloc[0]
-        st.metric("Total Words", int(stats['total_words'] or 0))
-        st.metric("Total Searches", int(stats['total_searches'] or 0))
-        st.metric("Avg Frequency", f"{stats['avg_frequency'] or 0:.2f}")
-        st.metric("Categories", int(stats['categories'] or 0))
-        st.metric("Languages", int(stats['languages'] or 0))
+        st.metric("Total Words", int(words_total))
+        st.metric("Total Searches", int(stats.get('word_frequency') or 0))
+        st.metric("Avg Frequency", f"{(stats.get('word_frequency') or 0) / max(words_total, 1):.2f}")
+        st.metric("Categories", int(stats.get('categories') or 0))
+        st.metric("Languages", int(stats.get('languages') or 0))
     
     with col_stats2:
         st.subheader("🔍 Search Statistics")
-        search = search_stats.iloc[0]
-        st.metric("Total Searches", int(search['total_searches'] or 0))
-        st.metric("Unique Prefixes", int(search['unique_prefixes'] or 0))
-        st.metric("Avg Search Time", f"{search['avg_search_time'] or 0:.6f}s")
-        st.metric("Algorithms Used", int(search['algorithms_used'] or 0))
+        st.metric("Total Searches", int(searches_total))
+        st.metric("Unique Prefixes", int(stats.get('prefixes') or 0))
+        st.metric("Avg Search Time", f"{(stats.get('search_time') or 0) / max(searches_total, 1):.6f}s")
+        st.metric("Algorithms Used", int(stats.get('algorithms') or 0))
 
 if __name__ == "__main__":
     main()
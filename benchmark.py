@@ -0,0 +1,100 @@
+import argparse
+import random
+import sqlite3
+import statistics
+import time
+import tracemalloc
+
+from advanced_app import (
+    MAX_SUGGESTIONS, Trie, RadixTree, DoubleArrayTrie, DAWG, SortedArrayIndex
+)
+
+# Engines compared by default; each factory returns an empty structure
+ENGINES = {
+    'Trie': lambda: Trie(top_k=MAX_SUGGESTIONS),
+    'Trie-uncached': Trie,
+    'Radix': RadixTree,
+    'DoubleArrayTrie': DoubleArrayTrie,
+    'DAWG': DAWG,
+    'SortedArray': SortedArrayIndex,
+}
+
+DEFAULT_SIZES = [7306, 100000, 1000000]
+
+def load_dictionary(size, seed=42):
+    """Dictionary words from autocomplete.db, padded with synthetic compounds"""
+    conn = sqlite3.connect('autocomplete.db')
+    words = dict(conn.execute('SELECT word, frequency FROM words').fetchall())
+    conn.close()
+
+    rng = random.Random(seed)
+    base = sorted(words)
+    while len(words) < size:
+        word = rng.choice(base) + rng.choice(base)
+        if word not in words:
+            words[word] = int(rng.paretovariate(1.2)) - 1
+    items = sorted(words.items())
+    return rng.sample(items, size) if size < len(items) else items
+
+def build(factory, items):
+    """Build an engine and return it with its build time and traced memory"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    engine = factory()
+    if hasattr(engine, 'bulk_load'):
+        engine.bulk_load(items)
+    else:
+        for word, frequency in items:
+            engine.insert(word, frequency)
+    elapsed = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return engine, elapsed, memory
+
+def sample_prefixes(items, iterations, seed=7):
+    rng = random.Random(seed)
+    prefixes = []
+    for _ in range(iterations):
+        word, _ = rng.choice(items)
+        prefixes.append(word[:rng.randint(1, min(3, len(word)))])
+    return prefixes
+
+def time_queries(engine, prefixes, limit):
+    timings = []
+    for prefix in prefixes:
+        start = time.perf_counter_ns()
+        engine.get_suggestions(prefix, limit)
+        timings.append((time.perf_counter_ns() - start) / 1000)
+    timings.sort()
+    return {
+        'mean_us': statistics.fmean(timings),
+        'p50_us': timings[len(timings) // 2],
+        'p99_us': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+    }
+
+def run(sizes, iterations, engines, limit=MAX_SUGGESTIONS):
+    print(f"{'engine':<16}{'words':>9}{'build s':>10}{'bytes/word':>12}"
+          f"{'mean us':>10}{'p50 us':>10}{'p99 us':>10}")
+    for size in sizes:
+        items = load_dictionary(size)
+        prefixes = sample_prefixes(items, iterations)
+        for name in engines:
+            engine, elapsed, memory = build(ENGINES[name], items)
+            stats = time_queries(engine, prefixes, limit)
+            print(f"{name:<16}{len(items):>9}{elapsed:>10.2f}{memory / len(items):>12.1f}"
+                  f"{stats['mean_us']:>10.1f}{stats['p50_us']:>10.1f}{stats['p99_us']:>10.1f}")
+            del engine
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark autocomplete engines")
+    parser.add_argument('--words', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="dictionary sizes to benchmark")
+    parser.add_argument('--iterations', type=int, default=1000,
+                        help="prefix queries per engine and size")
+    parser.add_argument('--algorithms', nargs='+', default=list(ENGINES),
+                        choices=list(ENGINES), help="engines to compare")
+    args = parser.parse_args()
+    run(args.words, args.iterations, args.algorithms)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import threading
+
+import pandas as pd
+
+from database import get_database
+
+# Dashboard figures kept up to date by triggers, so reading them costs a
+# few primary-key lookups however large the tables grow. Search figures
+# count every search ever recorded: compaction moves rows from
+# search_history into rollups without changing them.
+STATS = {
+    'words': 'SELECT COUNT(*) FROM words',
+    'word_frequency': 'SELECT COALESCE(SUM(frequency), 0) FROM words',
+    'categories': 'SELECT COUNT(DISTINCT category_id) FROM words',
+    'languages': 'SELECT COUNT(DISTINCT language_id) FROM words',
+    'searches': 'SELECT COALESCE(SUM(count), 0) FROM search_activity',
+    'search_time': 'SELECT COALESCE(SUM(total_time), 0) FROM search_activity',
+    'prefixes': 'SELECT COUNT(DISTINCT prefix_id) FROM search_activity',
+    'algorithms': 'SELECT COUNT(DISTINCT algorithm_id) FROM search_activity',
+}
+
+# Distinct ids behind the counts above: (kind, stat, table, column)
+VALUES = (
+    ('category', 'categories', 'words', 'category_id'),
+    ('language', 'languages', 'words', 'language_id'),
+    ('prefix', 'prefixes', 'search_activity', 'prefix_id'),
+    ('algorithm', 'algorithms', 'search_activity', 'algorithm_id'),
+)
+
+def _bump(name, amount):
+    return f"UPDATE stats_catalog SET value = value + ({amount}) WHERE name = '{name}';"
+
+def _value_added(kind, stat, value):
+    return f'''
+        UPDATE stats_catalog SET value = value + 1 WHERE name = '{stat}' AND {value} IS NOT NULL
+            AND NOT EXISTS (SELECT 1 FROM stats_values WHERE kind = '{kind}' AND value = {value});
+        INSERT INTO stats_values (kind, value, count) SELECT '{kind}', {value}, 1 WHERE {value} IS NOT NULL
+            ON CONFLICT (kind, value) DO UPDATE SET count = count + 1;'''
+
+def _value_removed(kind, stat, value):
+    return f'''
+        UPDATE stats_values SET count = count - 1 WHERE kind = '{kind}' AND value = {value};
+        UPDATE stats_catalog SET value = value - 1 WHERE name = '{stat}'
+            AND EXISTS (SELECT 1 FROM stats_values WHERE kind = '{kind}' AND value = {value} AND count = 0);
+        DELETE FROM stats_values WHERE kind = '{kind}' AND value = {value} AND count = 0;'''
+
+TRIGGERS = {
+    'words_stats_insert': ('AFTER INSERT ON words',
+        _bump('words', 1) + _bump('word_frequency', 'COALESCE(NEW.frequency, 0)')
+        + _value_added('category', 'categories', 'NEW.category_id')
+        + _value_added('language', 'languages', 'NEW.language_id')),
+    'words_stats_delete': ('AFTER DELETE ON words',
+        _bump('words', -1) + _bump('word_frequency', '-COALESCE(OLD.frequency, 0)')
+        + _value_removed('category', 'categories', 'OLD.category_id')
+        + _value_removed('language', 'languages', 'OLD.language_id')),
+    'words_stats_frequency': ('AFTER UPDATE OF frequency ON words',
+        _bump('word_frequency', 'COALESCE(NEW.frequency, 0) - COALESCE(OLD.frequency, 0)')),
+    'words_stats_category': ('AFTER UPDATE OF category_id ON words WHEN OLD.category_id IS NOT NEW.category_id',
+        _value_removed('category', 'categories', 'OLD.category_id')
+        + _value_added('category', 'categories', 'NEW.category_id')),
+    'words_stats_language': ('AFTER UPDATE OF language_id ON words WHEN OLD.language_id IS NOT NEW.language_id',
+        _value_removed('language', 'languages', 'OLD.language_id')
+        + _value_added('language', 'languages', 'NEW.language_id')),
+    'search_history_stats_insert': ('AFTER INSERT ON search_history',
+        _bump('searches', 1) + _bump('search_time', 'NEW.search_time')
+        + _value_added('prefix', 'prefixes', 'NEW.prefix_id')
+        + _value_added('algorithm', 'algorithms', 'NEW.algorithm_id')),
+    'performance_metrics_stats_insert': ('AFTER INSERT ON performance_metrics', '''
+        INSERT INTO metric_totals (algorithm_id, count, total_time) VALUES (NEW.algorithm_id, 1, NEW.execution_time)
+            ON CONFLICT (algorithm_id) DO UPDATE SET
+                count = count + 1, total_time = total_time + excluded.total_time;
+        INSERT OR IGNORE INTO change_counters (name, value) VALUES ('performance_metrics', 0);
+        UPDATE change_counters SET value = value + 1 WHERE name = 'performance_metrics';'''),
+}
+
+def ensure_stats_catalog(conn):
+    """Create, fill and start maintaining the catalog tables.
+
+    Needs the tables and the search_activity view from schema.py. The
+    initial fill and the triggers are created in one transaction, so no
+    write can slip in between.
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'stats_catalog'").fetchone():
+        return
+    script = ['''
+        BEGIN;
+        CREATE TABLE IF NOT EXISTS change_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE stats_catalog (
+            name TEXT PRIMARY KEY,
+            value NUMERIC NOT NULL
+        );
+        CREATE TABLE stats_values (
+            kind TEXT NOT NULL,
+            value INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (kind, value)
+        ) WITHOUT ROWID;
+        CREATE TABLE metric_totals (
+            algorithm_id INTEGER PRIMARY KEY REFERENCES algorithms (id),
+            count INTEGER NOT NULL,
+            total_time REAL NOT NULL
+        );
+        INSERT INTO metric_totals (algorithm_id, count, total_time)
+            SELECT algorithm_id, COUNT(*), SUM(execution_time) FROM performance_metrics GROUP BY algorithm_id;
+    ''']
+    for name, query in STATS.items():
+        script.append(f"INSERT INTO stats_catalog (name, value) SELECT '{name}', ({query});")
+    for kind, stat, table, column in VALUES:
+        script.append(f'''
+            INSERT INTO stats_values (kind, value, count)
+                SELECT '{kind}', {column}, COUNT(*) FROM {table}
+                WHERE {column} IS NOT NULL GROUP BY {column};''')
+    for name, (event, body) in TRIGGERS.items():
+        script.append(f'CREATE TRIGGER {name} {event} BEGIN {body} END;')
+    script.append('COMMIT;')
+    conn.executescript('\n'.join(script))
+
+def read_stats(conn=None):
+    """Every catalog figure by name"""
+    if conn is None:
+        return dict(get_database().read('SELECT name, value FROM stats_catalog'))
+    return dict(conn.execute('SELECT name, value FROM stats_catalog'))
+
+def change_counter(name, conn=None):
+    sql = 'SELECT value FROM change_counters WHERE name = ?'
+    row = conn.execute(sql, (name,)).fetchone() if conn else get_database().read_one(sql, (name,))
+    return row[0] if row else 0
+
+class FrameCache:
+    """pandas frames of read-only queries, reused until a change counter moves"""
+    def __init__(self, database=None):
+        self.database = database or get_database()
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def get(self, counter, sql, params=()):
+        with self.database.reader() as conn:
+            version = change_counter(counter, conn)
+            key = (sql, params)
+            cached = self._frames.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            frame = pd.read_sql_query(sql, conn, params=params)
+        with self._lock:
+            self._frames[key] = (version, frame)
+        return frame
+
+_frame_cache = None
+_frame_cache_lock = threading.Lock()
+
+def get_frame_cache():
+    """The process-wide FrameCache"""
+    global _frame_cache
+    with _frame_cache_lock:
+        if _frame_cache is None:
+            _frame_cache = FrameCache()
+        return _frame_cache
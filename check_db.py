@@ -9,18 +9,21 @@ total_words = cursor.fetchone()[0]
 print(f'Total words: {total_words}')
 
 # Top categories
-cursor.execute('SELECT category, COUNT(*) FROM words GROUP BY category ORDER BY COUNT(*) DESC LIMIT 15')
+cursor.execute('''
+    SELECT c.name, COUNT(*) FROM words w LEFT JOIN categories c ON c.id = w.category_id
+    GROUP BY w.category_id ORDER BY COUNT(*) DESC LIMIT 15
+''')
 print('\nTop categories:')
 for cat, count in cursor.fetchall():
     print(f'  {cat}: {count}')
 
 # Sample words from each category
-cursor.execute('SELECT DISTINCT category FROM words')
-categories = [row[0] for row in cursor.fetchall()]
+cursor.execute('SELECT id, name FROM categories')
+categories = cursor.fetchall()
 
 print('\nSample words from each category:')
-for category in categories[:10]:  # Show first 10 categories
-    cursor.execute('SELECT word FROM words WHERE category = ? LIMIT 5', (category,))
+for category_id, category in categories[:10]:  # Show first 10 categories
+    cursor.execute('SELECT word FROM words WHERE category_id = ? LIMIT 5', (category_id,))
     words = [row[0] for row in cursor.fetchall()]
     print(f'  {category}: {", ".join(words)}')
 
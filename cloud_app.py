@@ -1,7 +1,5 @@
 import streamlit as st
-import sqlite3
 import time
-import json
 import pickle
 import os
 from datetime import datetime
@@ -9,121 +7,81 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from catalog import ensure_stats_catalog, read_stats
+from database import BufferedWriter, FrequencyBuffer, get_database
+from history import get_history
+from prefix_filter import PrefixFilter
+from schema import ensure_schema, insert_metrics, insert_words
+from shared_engine import LazyBuilder, SnapshotSwap, catch_up
 
-# Try to import BloomFilter, fallback if not available
-try:
-    from pybloom_live import BloomFilter
-    BLOOM_AVAILABLE = True
-except ImportError:
-    BLOOM_AVAILABLE = False
-    print("BloomFilter not available, using fallback")
 
 # Database setup
 def init_database():
-    conn = sqlite3.connect('autocomplete.db')
-    cursor = conn.cursor()
-    
-    # Words table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS words (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            word TEXT UNIQUE NOT NULL,
-            frequency INTEGER DEFAULT 0,
-            category TEXT DEFAULT 'general',
-            language TEXT DEFAULT 'en',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Search history table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS search_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            prefix TEXT NOT NULL,
-            suggestions TEXT NOT NULL,
-            selected_word TEXT,
-            algorithm TEXT NOT NULL,
-            search_time REAL NOT NULL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Performance metrics table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS performance_metrics (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            algorithm TEXT NOT NULL,
-            operation TEXT NOT NULL,
-            execution_time REAL NOT NULL,
-            memory_usage REAL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+    get_database().run(_create_tables)
+
+def _create_tables(conn):
+    # Normalized tables, migrating a legacy database first
+    ensure_schema(conn)
     
-    conn.commit()
-    conn.close()
+    # Dashboard statistics kept current by triggers
+    ensure_stats_catalog(conn)
 
 # Database Manager
 class DatabaseManager:
     def __init__(self):
-        self.conn = sqlite3.connect('autocomplete.db', check_same_thread=False)
-        self.cursor = self.conn.cursor()
+        self.db = get_database()
     
     def load_words(self):
-        self.cursor.execute("SELECT word, frequency, category FROM words")
-        return self.cursor.fetchall()
+        return self.db.read("""
+            SELECT w.word, w.frequency, c.name
+            FROM words w LEFT JOIN categories c ON c.id = w.category_id
+        """)
     
     def save_word(self, word, frequency=0, category='general'):
         try:
-            self.cursor.execute(
-                "INSERT OR REPLACE INTO words (word, frequency, category) VALUES (?, ?, ?)",
-                (word, frequency, category)
-            )
-            self.conn.commit()
+            self.db.run(lambda conn: insert_words(
+                conn, [(word, frequency, category, 'en')], replace=True
+            ))
         except Exception as e:
             print(f"Error saving word: {e}")
     
     def save_search_history(self, prefix, suggestions, selected_word, algorithm, search_time):
-        self.cursor.execute(
-            "INSERT INTO search_history (prefix, suggestions, selected_word, algorithm, search_time) VALUES (?, ?, ?, ?, ?)",
-            (prefix, json.dumps(suggestions), selected_word, algorithm, search_time)
-        )
-        self.conn.commit()
+        get_history().add(prefix, suggestions, selected_word, algorithm, search_time)
     
     def get_search_history(self, limit=50):
-        self.cursor.execute(
-            "SELECT * FROM search_history ORDER BY timestamp DESC LIMIT ?",
-            (limit,)
-        )
-        return self.cursor.fetchall()
+        return get_history().recent(limit)
     
     def get_performance_metrics(self):
-        self.cursor.execute("""
-            SELECT algorithm, AVG(execution_time) as avg_time, COUNT(*) as count
-            FROM performance_metrics
-            GROUP BY algorithm
+        return self.db.read("""
+            SELECT a.name, t.total_time / t.count as avg_time, t.count
+            FROM metric_totals t JOIN algorithms a ON a.id = t.algorithm_id
+            ORDER BY a.name
         """)
-        return self.cursor.fetchall()
     
     def get_word_stats(self):
-        self.cursor.execute("""
-            SELECT 
-                COUNT(*) as total_words,
-                SUM(frequency) as total_searches,
-                AVG(frequency) as avg_frequency,
-                COUNT(DISTINCT category) as categories,
-                COUNT(DISTINCT language) as languages
-            FROM words
-        """)
-        return self.cursor.fetchall()
+        stats = read_stats()
+        words = stats.get('words') or 0
+        frequency = stats.get('word_frequency') or 0
+        return [(words, frequency, frequency / words if words else None,
+                 stats.get('categories') or 0, stats.get('languages') or 0)]
     
     def close(self):
-        self.conn.close()
+        self.db.flush()
 
 # Performance Monitor
 class PerformanceMonitor:
     def __init__(self):
-        self.db_manager = DatabaseManager()
+        self.writer = BufferedWriter(insert_metrics)
+        self.prefix_checks = 0
+        self.prefix_rejections = 0
+        self.prefix_false_positives = 0
+    
+    def record_prefix_check(self, rejected, found=True):
+        self.prefix_checks += 1
+        if rejected:
+            self.prefix_rejections += 1
+        elif not found:
+            self.prefix_false_positives += 1
     
     def measure_operation(self, algorithm, operation, func):
         start_time = time.time()
@@ -131,26 +89,29 @@ class PerformanceMonitor:
         end_time = time.time()
         execution_time = end_time - start_time
         
-        self.db_manager.cursor.execute(
-            "INSERT INTO performance_metrics (algorithm, operation, execution_time) VALUES (?, ?, ?)",
-            (algorithm, operation, execution_time)
-        )
-        self.db_manager.conn.commit()
+        # Written in batches by a background thread
+        self.writer.add((algorithm, operation, execution_time))
         
         return result, execution_time
 
+def _ranked(results):
+    # Highest frequency first, ties broken alphabetically
+    results.sort(key=lambda item: (-item[1], item[0]))
+    return [word for word, frequency in results]
+
 # Trie Implementation
 class TrieNode:
     def __init__(self):
         self.children = {}
         self.is_end = False
         self.word = None
+        self.frequency = 0
 
 class Trie:
     def __init__(self):
         self.root = TrieNode()
     
-    def insert(self, word):
+    def insert(self, word, frequency=0):
         node = self.root
         for char in word:
             if char not in node.children:
@@ -158,6 +119,18 @@ class Trie:
             node = node.children[char]
         node.is_end = True
         node.word = word
+        node.frequency = frequency
+    
+    def increment(self, word, delta=1):
+        node = self.root
+        for char in word:
+            node = node.children.get(char)
+            if node is None:
+                return False
+        if not node.is_end:
+            return False
+        node.frequency += delta
+        return True
     
     def get_suggestions(self, prefix):
         node = self.root
@@ -168,11 +141,11 @@ class Trie:
         
         results = []
         self._collect_words(node, results)
-        return results
+        return _ranked(results)
     
     def _collect_words(self, node, results):
         if node.is_end:
-            results.append(node.word)
+            results.append((node.word, node.frequency))
         for child in node.children.values():
             self._collect_words(child, results)
 
@@ -185,41 +158,53 @@ class TSTNode:
         self.right = None
         self.is_end_of_word = False
         self.word = None
+        self.frequency = 0
 
 class TernarySearchTree:
     def __init__(self):
         self.root = None
     
-    def insert(self, word):
-        self.root = self._insert_recursive(self.root, word, 0)
+    def insert(self, word, frequency=0):
+        if word:
+            self.root = self._insert_recursive(self.root, word, 0, frequency)
     
-    def _insert_recursive(self, node, word, index):
+    def _insert_recursive(self, node, word, index, frequency):
         char = word[index]
         
         if node is None:
             node = TSTNode(char)
         
         if char < node.char:
-            node.left = self._insert_recursive(node.left, word, index)
+            node.left = self._insert_recursive(node.left, word, index, frequency)
         elif char > node.char:
-            node.right = self._insert_recursive(node.right, word, index)
+            node.right = self._insert_recursive(node.right, word, index, frequency)
         else:
             if index + 1 < len(word):
-                node.eq = self._insert_recursive(node.eq, word, index + 1)
+                node.eq = self._insert_recursive(node.eq, word, index + 1, frequency)
             else:
                 node.is_end_of_word = True
                 node.word = word
+                node.frequency = frequency
         
         return node
     
+    def increment(self, word, delta=1):
+        node = self._search_node(self.root, word, 0) if word else None
+        if node is None or not node.is_end_of_word:
+            return False
+        node.frequency += delta
+        return True
+    
     def get_suggestions(self, prefix):
-        node = self._search_node(self.root, prefix, 0)
+        node = self._search_node(self.root, prefix, 0) if prefix else None
         if not node:
             return []
         
         results = []
-        self._collect_words_tst(node, results)
-        return results
+        if node.is_end_of_word:
+            results.append((node.word, node.frequency))
+        self._collect_words_tst(node.eq, results)
+        return _ranked(results)
     
     def _search_node(self, node, word, index):
         if node is None:
@@ -242,7 +227,7 @@ class TernarySearchTree:
             return
         
         if node.is_end_of_word:
-            results.append(node.word)
+            results.append((node.word, node.frequency))
         
         self._collect_words_tst(node.left, results)
         self._collect_words_tst(node.eq, results)
@@ -250,102 +235,157 @@ class TernarySearchTree:
 
 # BST Implementation
 class BSTNode:
-    def __init__(self, word):
+    def __init__(self, word, frequency=0):
         self.word = word
-        self.frequency = 0
+        self.frequency = frequency
         self.left = None
         self.right = None
 
 class BinarySearchTree:
     def __init__(self):
         self.root = None
-        self.words = []
     
-    def insert(self, word):
-        self.words.append(word)
+    def insert(self, word, frequency=0):
         if self.root is None:
-            self.root = BSTNode(word)
-        else:
-            self._insert_recursive(self.root, word)
-    
-    def _insert_recursive(self, node, word):
-        if word < node.word:
-            if node.left is None:
-                node.left = BSTNode(word)
-            else:
-                self._insert_recursive(node.left, word)
-        else:
-            if node.right is None:
-                node.right = BSTNode(word)
-            else:
-                self._insert_recursive(node.right, word)
+            self.root = BSTNode(word, frequency)
+            return
+        node = self.root
+        while True:
+            if word == node.word:
+                node.frequency = frequency
+                return
+            branch = 'left' if word < node.word else 'right'
+            child = getattr(node, branch)
+            if child is None:
+                setattr(node, branch, BSTNode(word, frequency))
+                return
+            node = child
+    
+    def increment(self, word, delta=1):
+        node = self.root
+        while node and node.word != word:
+            node = node.left if word < node.word else node.right
+        if node is None:
+            return False
+        node.frequency += delta
+        return True
     
     def get_suggestions(self, prefix):
-        return [word for word in self.words if word.startswith(prefix)]
+        results = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if node.word.startswith(prefix):
+                results.append((node.word, node.frequency))
+                stack.extend((node.left, node.right))
+            elif node.word < prefix:
+                stack.append(node.right)
+            else:
+                stack.append(node.left)
+        return _ranked(results)
 
 # Enhanced Autocomplete System
+# Engines are built the first time a session asks for them
+ENGINE_FACTORIES = {
+    'Trie': Trie,
+    'TST': TernarySearchTree,
+    'BST': BinarySearchTree
+}
+BACKGROUND_BUILD = True
+ENGINE_IDLE_TIMEOUT = 900  # seconds; None keeps every built engine
+FREQUENCY_DURABILITY = 'interval'  # or 'journal' to survive crashes
+
+# One complete copy of the in-memory search structures
+class EngineState:
+    def __init__(self, words):
+        self.words = {word: frequency for word, frequency, category in words}
+        self.algorithms = {}
+        
+        # Sized from the dictionary's actual prefix count
+        self.prefix_filter = PrefixFilter.build(self.words)
+    
+    def source(self):
+        return dict(self.words)
+    
+    def create(self, name, source):
+        # Runs outside the write lock, on a copy of the words
+        algorithm = ENGINE_FACTORIES[name]()
+        for word, frequency in source.items():
+            algorithm.insert(word, frequency)
+        return algorithm
+    
+    def install(self, name, algorithm, source):
+        if name not in self.algorithms:
+            catch_up(algorithm, source, self.words)
+            self.algorithms[name] = algorithm
+    
+    def release(self, name):
+        self.algorithms.pop(name, None)
+    
+    def increment(self, word, delta=1):
+        if word in self.words:
+            self.words[word] += delta
+        for algorithm in self.algorithms.values():
+            algorithm.increment(word, delta)
+
 class EnhancedAutoCompleteSystem:
     def __init__(self):
         self.monitor = PerformanceMonitor()
         self.db_manager = DatabaseManager()
-        self.algorithms = {
-            'Trie': Trie(),
-            'TST': TernarySearchTree(),
-            'BST': BinarySearchTree()
-        }
-        
-        # Initialize Bloom Filter only if available
-        if BLOOM_AVAILABLE:
-            self.bloom_filter = BloomFilter(capacity=100000, error_rate=0.01)
-        else:
-            self.bloom_filter = None
-            print("Running without Bloom Filter optimization")
-        
+        self.frequencies = FrequencyBuffer(durability=FREQUENCY_DURABILITY)
         self.load_data()
     
     def load_data(self):
         words = self.db_manager.load_words()
-        for word, frequency, category in words:
-            for algorithm in self.algorithms.values():
-                algorithm.insert(word)
-            
-            if self.bloom_filter:
-                for i in range(1, len(word) + 1):
-                    self.bloom_filter.add(word[:i])
+        self.state = SnapshotSwap(EngineState(words), EngineState(words))
+        self.builder = LazyBuilder(self.state, BACKGROUND_BUILD, ENGINE_IDLE_TIMEOUT)
     
     def get_suggestions(self, prefix, algorithm_name='Trie'):
-        algorithm = self.algorithms.get(algorithm_name)
-        if not algorithm:
+        if algorithm_name not in ENGINE_FACTORIES:
             return [], 0
         
-        # Bloom Filter check (only if available)
-        if self.bloom_filter and prefix not in self.bloom_filter:
-            return [], 0.001  # Fast return if no words start with prefix
+        with self.state.read() as state:
+            if prefix not in state.prefix_filter:
+                self.monitor.record_prefix_check(rejected=True)
+                return [], 0.001  # Fast return if no words start with prefix
+        
+        engine = self.builder.resolve(algorithm_name)
         
         def search_operation():
-            return algorithm.get_suggestions(prefix)
+            with self.state.read() as state:
+                found = state.algorithms.get(engine)
+                if found is not None:
+                    return found.get_suggestions(prefix)
+            # An idle release dropped the engine after resolve(): pick again,
+            # outside the read, as resolve() may wait for a build
+            retry = self.builder.resolve(algorithm_name)
+            with self.state.read() as state:
+                return state.algorithms[retry].get_suggestions(prefix)
         
         suggestions, exec_time = self.monitor.measure_operation(
-            algorithm_name, 'search', search_operation
+            engine, 'search', search_operation
         )
+        self.monitor.record_prefix_check(rejected=False, found=bool(suggestions))
         
-        # Sort by frequency
-        word_freq = {word: freq for word, freq, _ in self.db_manager.load_words()}
-        suggestions.sort(key=lambda w: -word_freq.get(w, 0))
-        
+        # Structures already rank by their in-memory frequencies
         return suggestions[:10], exec_time
     
-    def select_word(self, word, prefix, algorithm_name, search_time):
-        self.db_manager.cursor.execute(
-            "UPDATE words SET frequency = frequency + 1 WHERE word = ?",
-            (word,)
-        )
-        self.db_manager.conn.commit()
+    def select_word(self, word, prefix, algorithm_name, search_time, suggestions=()):
+        self.state.write(lambda state: state.increment(word))
+        self.frequencies.add(word)
         
         self.db_manager.save_search_history(
-            prefix, [word], word, algorithm_name, search_time
+            prefix, suggestions, word, algorithm_name, search_time
         )
 
+@st.cache_resource
+def get_shared_system():
+    """One autocomplete system per process, shared by all browser sessions"""
+    init_database()
+    return EnhancedAutoCompleteSystem()
+
 # Main Streamlit App
 def main():
     st.set_page_config(
@@ -355,17 +395,12 @@ def main():
         initial_sidebar_state="expanded"
     )
     
-    # Initialize database
-    init_database()
-    
-    # Initialize system
-    if 'system' not in st.session_state:
-        st.session_state.system = EnhancedAutoCompleteSystem()
+    # Initialize system; this also creates the tables, once per process
+    system = get_shared_system()
+    if 'current_prefix' not in st.session_state:
         st.session_state.search_history = []
         st.session_state.current_prefix = ""
     
-    system = st.session_state.system
-    
     st.title("🚀 FORETYPE - Advanced Autocomplete Engine")
     st.markdown("---")
     
@@ -379,11 +414,16 @@ def main():
         index=0
     )
     
-    # Bloom Filter status
-    if BLOOM_AVAILABLE:
-        st.sidebar.success("✅ Bloom Filter: Active")
+    # Prefix filter status
+    monitor = system.monitor
+    if monitor.prefix_checks:
+        negatives = monitor.prefix_rejections + monitor.prefix_false_positives
+        st.sidebar.success(
+            f"✅ Prefix filter rejected {monitor.prefix_rejections / monitor.prefix_checks:.1%} of queries "
+            f"({monitor.prefix_false_positives / max(negatives, 1):.2%} false positives)"
+        )
     else:
-        st.sidebar.warning("⚠️ Bloom Filter: Not Available")
+        st.sidebar.success("✅ Prefix filter: Active")
     
     # Main search interface
     col1, col2 = st.columns([3, 1])
@@ -423,7 +463,7 @@ def main():
             for i, word in enumerate(suggestions):
                 with cols[i % 5]:
                     if st.button(word, key=f"suggestion_{i}"):
-                        system.select_word(word, prefix, algorithm, search_time)
+                        system.select_word(word, prefix, algorithm, search_time, suggestions)
                         st.success(f"✅ Selected: {word}")
                         st.rerun()
         else:
@@ -453,7 +493,7 @@ def main():
     history = system.db_manager.get_search_history(20)
     if history:
         df_history = pd.DataFrame(history, columns=[
-            'ID', 'Prefix', 'Suggestions', 'Selected', 'Algorithm', 'Time', 'Timestamp'
+            'Prefix', 'Suggestions', 'Selected', 'Algorithm', 'Time', 'Timestamp'
         ])
         st.dataframe(df_history[['Prefix', 'Selected', 'Algorithm', 'Time', 'Timestamp']])
     else:
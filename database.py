@@ -0,0 +1,365 @@
+import atexit
+import collections
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+DB_PATH = 'autocomplete.db'
+
+# Applied to every connection. WAL lets readers run alongside the writer;
+# synchronous=NORMAL only fsyncs at checkpoints, which WAL keeps consistent.
+PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-16384',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA busy_timeout=5000',
+    # INSERT OR REPLACE then fires delete triggers, which the stats catalog needs
+    'PRAGMA recursive_triggers=ON',
+)
+# sqlite3 keeps this many compiled statements per connection, keyed by SQL
+# text; long-lived connections therefore prepare each statement once
+STATEMENT_CACHE = 256
+WRITE_BATCH = 256  # Queued writes committed together at most
+READERS = 4  # Read connections in the pool at most
+
+# BufferedWriter defaults: ring size, rows that trigger an early flush, and
+# the longest a row waits before it is written
+BUFFER_CAPACITY = 65536
+FLUSH_ROWS = 512
+FLUSH_INTERVAL = 0.25
+
+FREQUENCY_INTERVAL = 2.0  # Seconds between frequency merges
+JOURNAL_PATH = 'autocomplete.freq.journal'
+
+class Database:
+    """SQLite access shared by every thread of the process.
+
+    Reads borrow a connection from a pool of at most READERS, so threads
+    that come and go (Streamlit starts one per rerun) reuse the same few
+    connections. All writes go through a queue owned by one writer thread,
+    which commits whatever has queued up in a single transaction, so
+    writers never contend for the lock and, under WAL, readers never wait
+    for them.
+    """
+    def __init__(self, path=DB_PATH, readers=READERS):
+        self.path = path
+        self.readers = readers
+        self._pool = queue.LifoQueue()
+        self._pooled = 0
+        self._connections = []
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name='sqlite-writer', daemon=True)
+        self._writer.start()
+        self.run(lambda conn: conn.execute('PRAGMA journal_mode=WAL').fetchone())
+
+    def _connect(self):
+        # check_same_thread is off: pooled connections move between threads
+        conn = sqlite3.connect(self.path, timeout=5, cached_statements=STATEMENT_CACHE,
+                               check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def reader(self):
+        """A pooled connection for reads, returned to the pool on exit.
+
+        Waits for one to come back when all READERS are in use, so do not
+        nest these.
+        """
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._pooled < self.readers
+                if grow:
+                    self._pooled += 1
+            conn = self._connect() if grow else self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def read(self, sql, params=()):
+        with self.reader() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def read_one(self, sql, params=()):
+        with self.reader() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def run(self, job, wait=True):
+        """Run job(conn) on the writer thread inside a transaction.
+
+        With wait=True, returns the job's result or raises its exception;
+        otherwise returns a Future.
+        """
+        future = Future()
+        self._queue.put((job, future))
+        return future.result() if wait else future
+
+    def write(self, sql, params=(), wait=False):
+        return self.run(lambda conn: conn.execute(sql, params).rowcount, wait)
+
+    def write_many(self, sql, rows, wait=False):
+        return self.run(lambda conn: conn.executemany(sql, rows).rowcount, wait)
+
+    def flush(self):
+        """Wait until every write queued so far is committed"""
+        self.run(lambda conn: None)
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            jobs = [self._queue.get()]
+            while len(jobs) < WRITE_BATCH:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(job is None for job in jobs)
+            jobs = [job for job in jobs if job is not None]
+            try:
+                with conn:
+                    results = [job(conn) for job, future in jobs]
+            except Exception:
+                # Find the failing job: retry each in its own transaction
+                for job, future in jobs:
+                    self._run_one(conn, job, future)
+            else:
+                for (job, future), result in zip(jobs, results):
+                    future.set_result(result)
+                del results
+            if stop:
+                return
+
+    @staticmethod
+    def _run_one(conn, job, future):
+        try:
+            with conn:
+                result = job(conn)
+        except Exception as error:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def close(self):
+        """Commit queued writes, stop the writer and close every connection"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+def get_database(path=DB_PATH):
+    """The process-wide Database for path"""
+    with _databases_lock:
+        database = _databases.get(path)
+        if database is None:
+            database = _databases[path] = Database(path)
+            atexit.register(database.close)
+        return database
+
+class Flusher:
+    """Runs flush() every interval seconds on a background thread, and once
+    more on close(), which runs at interpreter exit."""
+    def _start(self, interval, name):
+        self.interval = interval
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._flush_loop, name=name, daemon=True)
+        self._thread.start()
+        # Registered after the database, so atexit runs this first
+        atexit.register(self.close)
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error writing buffered rows: {e}")
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._wake.set()
+            self._thread.join()
+            self.flush()
+
+class BufferedWriter(Flusher):
+    """Rows for one table, kept in memory and written in batches.
+
+    add() only appends to a bounded ring buffer. A background thread writes
+    whatever has accumulated every interval seconds, or as soon as batch
+    rows are waiting, in one transaction on the writer thread: write is an
+    INSERT statement run with executemany, or a function(conn, rows). When the
+    buffer is full the oldest rows are dropped and counted.
+    """
+    def __init__(self, write, capacity=BUFFER_CAPACITY, batch=FLUSH_ROWS,
+                 interval=FLUSH_INTERVAL, database=None):
+        self.write = write
+        self.batch = batch
+        self.database = database or get_database()
+        self.rows = collections.deque(maxlen=capacity)
+        self.written = 0
+        self.dropped = 0
+        self._start(interval, 'sqlite-buffer')
+
+    def add(self, row):
+        rows = self.rows
+        if len(rows) == rows.maxlen:
+            self.dropped += 1
+        rows.append(row)
+        if len(rows) >= self.batch:
+            self._wake.set()
+
+    def flush(self):
+        """Write every buffered row now; returns how many were written"""
+        with self._flush_lock:
+            rows = []
+            try:
+                while True:
+                    rows.append(self.rows.popleft())
+            except IndexError:
+                pass
+            if rows:
+                if callable(self.write):
+                    self.database.run(lambda conn: self.write(conn, rows))
+                else:
+                    self.database.write_many(self.write, rows, wait=True)
+                self.written += len(rows)
+            return len(rows)
+
+class FrequencyBuffer(Flusher):
+    """Write-behind frequency increments for the words table.
+
+    add() only updates an in-memory delta map; a background thread merges
+    it into words with one batched UPDATE every interval seconds. With
+    durability='interval' a crash loses at most that interval of
+    increments. With durability='journal' every increment is also appended
+    to a journal segment before add() returns; each flush starts a new
+    segment and records the last merged one in change_counters in the same
+    transaction, so segments left behind by a crash are replayed exactly
+    once on the next start.
+    """
+    # Increments never create words: ones not in the table are ignored
+    UPDATE = 'UPDATE words SET frequency = frequency + ? WHERE word = ?'
+
+    def __init__(self, interval=FREQUENCY_INTERVAL, durability='interval',
+                 journal_path=JOURNAL_PATH, database=None):
+        if durability not in ('interval', 'journal'):
+            raise ValueError(f"unknown durability mode: {durability}")
+        self.database = database or get_database()
+        self.deltas = {}
+        self._lock = threading.Lock()
+        self.journal = None
+        if durability == 'journal':
+            self.journal_path = journal_path
+            self._counter = 'journal:' + os.path.basename(journal_path)
+            self._segment = self._merged_from = self._replay() + 1
+            self.journal = open(self._segment_path(self._segment), 'a', encoding='utf-8')
+        self._start(interval, 'sqlite-frequencies')
+
+    def add(self, word, delta=1):
+        with self._lock:
+            self.deltas[word] = self.deltas.get(word, 0) + delta
+            if self.journal:
+                self.journal.write(f"{delta}\t{word}\n")
+                self.journal.flush()
+
+    def flush(self):
+        """Merge the buffered increments now; returns how many words changed"""
+        with self._flush_lock:
+            with self._lock:
+                deltas, self.deltas = self.deltas, {}
+                if not deltas:
+                    return 0
+                segment = None
+                if self.journal:
+                    self.journal.close()
+                    segment = self._segment
+                    self._segment += 1
+                    self.journal = open(self._segment_path(self._segment), 'a', encoding='utf-8')
+            try:
+                self._merge(deltas, segment)
+            except Exception:
+                # Keep the increments for the next flush; its segment number
+                # covers this segment too
+                with self._lock:
+                    for word, delta in deltas.items():
+                        self.deltas[word] = self.deltas.get(word, 0) + delta
+                raise
+            if segment is not None:
+                while self._merged_from <= segment:
+                    os.remove(self._segment_path(self._merged_from))
+                    self._merged_from += 1
+            return len(deltas)
+
+    def close(self):
+        super().close()
+        if self.journal:
+            self.journal.close()
+            os.remove(self._segment_path(self._segment))
+            self.journal = None
+
+    def _merge(self, deltas, segment=None):
+        def job(conn):
+            conn.executemany(self.UPDATE, [(delta, word) for word, delta in deltas.items()])
+            if segment is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO change_counters (name, value) VALUES (?, ?)",
+                    (self._counter, segment))
+        self.database.run(job)
+
+    def _segment_path(self, segment):
+        return f"{self.journal_path}.{segment}"
+
+    def _replay(self):
+        """Merge segments a previous process left behind; returns the last segment number"""
+        def setup(conn):
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS change_counters (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            row = conn.execute("SELECT value FROM change_counters WHERE name = ?",
+                               (self._counter,)).fetchone()
+            return row[0] if row else 0
+        merged = self.database.run(setup)
+
+        directory = os.path.dirname(self.journal_path) or '.'
+        stem = os.path.basename(self.journal_path) + '.'
+        segments = sorted(int(name[len(stem):]) for name in os.listdir(directory)
+                          if name.startswith(stem) and name[len(stem):].isdigit())
+        deltas = {}
+        for segment in segments:
+            if segment <= merged:
+                continue
+            with open(self._segment_path(segment), encoding='utf-8') as f:
+                for line in f:
+                    delta, sep, word = line.rstrip('\n').partition('\t')
+                    # A crash can cut the last line short
+                    if sep and word and delta.lstrip('-').isdigit():
+                        deltas[word] = deltas.get(word, 0) + int(delta)
+        last = max(segments + [merged])
+        if last > merged:
+            self._merge(deltas, last)
+        for segment in segments:
+            os.remove(self._segment_path(segment))
+        return last
@@ -0,0 +1,241 @@
+import argparse
+import os
+import sqlite3
+from array import array
+from bisect import bisect_left, bisect_right
+
+from snapshot import ensure_change_counter, words_version
+
+MAGIC = b'FTDAWG02'
+DAWG_PATH = 'autocomplete.dawg'
+
+class Automaton:
+    """Minimal acyclic automaton of a sorted word list, stored in flat arrays.
+
+    The edges of state s are edge_start[s]:edge_start[s + 1], sorted by
+    character code. Each edge carries a pushed weight (edge_output): the
+    number of words that sort before any word taking that edge. Summing the
+    weights along a word's path yields its rank in sorted order, so a prefix
+    maps to the contiguous rank range [rank, rank + counts[state]) and
+    per-word data lives in plain arrays indexed by rank.
+    """
+    ROOT = 0
+
+    def __init__(self, final, counts, edge_start, edge_char, edge_target, edge_output):
+        self.final = final
+        self.counts = counts
+        self.edge_start = edge_start
+        self.edge_char = edge_char
+        self.edge_target = edge_target
+        self.edge_output = edge_output
+
+    def __len__(self):
+        return self.counts[self.ROOT] if self.counts else 0
+
+    @property
+    def nbytes(self):
+        return sum(table.itemsize * len(table) for table in self._tables())
+
+    def _tables(self):
+        return (self.final, self.counts, self.edge_start,
+                self.edge_char, self.edge_target, self.edge_output)
+
+    def _edge(self, state, char):
+        lo, hi = self.edge_start[state], self.edge_start[state + 1]
+        code = ord(char)
+        edge = bisect_left(self.edge_char, code, lo, hi)
+        return edge, edge < hi and self.edge_char[edge] == code
+
+    def walk(self, prefix):
+        """(state, rank of the first completion) after spelling prefix, or None"""
+        state, rank = self.ROOT, 0
+        for char in prefix:
+            edge, found = self._edge(state, char)
+            if not found:
+                return None
+            rank += self.edge_output[edge]
+            state = self.edge_target[edge]
+        return state, rank
+
+    def rank(self, word):
+        """(number of words sorting before word, whether word is present)"""
+        state, rank = self.ROOT, 0
+        for char in word:
+            edge, found = self._edge(state, char)
+            if not found:
+                if edge < self.edge_start[state + 1]:
+                    return rank + self.edge_output[edge], False
+                return rank + self.counts[state], False
+            rank += self.edge_output[edge]
+            state = self.edge_target[edge]
+        return rank, bool(self.final[state])
+
+    def word_at(self, rank):
+        """Word with the given rank"""
+        state, chars = self.ROOT, []
+        while not (self.final[state] and rank == 0):
+            lo, hi = self.edge_start[state], self.edge_start[state + 1]
+            edge = bisect_right(self.edge_output, rank, lo, hi) - 1
+            chars.append(chr(self.edge_char[edge]))
+            rank -= self.edge_output[edge]
+            state = self.edge_target[edge]
+        return ''.join(chars)
+
+    def save(self, path, frequencies, version):
+        """Write to path atomically, stamped with the words counter version"""
+        temp = path + '.tmp'
+        with open(temp, 'wb') as f:
+            f.write(MAGIC)
+            f.write(version.to_bytes(8, 'little'))
+            for table in self._tables() + (frequencies,):
+                f.write(table.typecode.encode())
+                f.write(len(table).to_bytes(8, 'little'))
+                table.tofile(f)
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path, version=None):
+        """(automaton, frequencies) from a file written by save().
+
+        With a version, raises ValueError unless the file was compiled from
+        that version of the words table.
+        """
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a compiled DAWG")
+            stored = int.from_bytes(f.read(8), 'little')
+            if version is not None and stored != version:
+                raise ValueError(f"{path} was compiled from another version of the words")
+            tables = []
+            for _ in range(7):
+                table = array(f.read(1).decode())
+                table.fromfile(f, int.from_bytes(f.read(8), 'little'))
+                tables.append(table)
+        return cls(*tables[:6]), tables[6]
+
+def compile_dawg(items):
+    """Build (Automaton, frequencies by rank) from (word, frequency) sorted by word.
+
+    Uses incremental minimization for sorted input: once a word is added, the
+    states of the previous word beyond the shared prefix can never change, so
+    they are merged with an equivalent registered state right away.
+    """
+    finals = [False]
+    edges = [[]]
+    register = {}
+    unchecked = []  # (parent, char, child) along the previous word
+    frequencies = array('q')
+    previous = None
+
+    def minimize(down_to):
+        while len(unchecked) > down_to:
+            parent, char, child = unchecked.pop()
+            key = (finals[child], tuple(edges[child]))
+            existing = register.get(key)
+            if existing is None:
+                register[key] = child
+            else:
+                edges[parent][-1] = (char, existing)
+
+    for word, frequency in items:
+        if not word:
+            continue
+        if previous is not None and word <= previous:
+            raise ValueError("words must be unique and sorted")
+        common = 0
+        if previous is not None:
+            limit = min(len(word), len(previous))
+            while common < limit and word[common] == previous[common]:
+                common += 1
+        minimize(common)
+        state = unchecked[-1][2] if unchecked else Automaton.ROOT
+        for char in word[common:]:
+            finals.append(False)
+            edges.append([])
+            child = len(edges) - 1
+            edges[state].append((char, child))
+            unchecked.append((state, char, child))
+            state = child
+        finals[state] = True
+        frequencies.append(frequency)
+        previous = word
+    minimize(0)
+    return _flatten(finals, edges), frequencies
+
+def _flatten(finals, edges):
+    """Renumber the reachable states and pack them into an Automaton"""
+    number = {Automaton.ROOT: 0}
+    order = [Automaton.ROOT]
+    for state in order:
+        for char, child in edges[state]:
+            if child not in number:
+                number[child] = len(order)
+                order.append(child)
+
+    counts = array('I', bytes(4 * len(order)))
+    for state in reversed(order):
+        # Children are numbered after their first parent, but a shared state
+        # can be reached from a later one, so count depth-first on demand.
+        _count_words(state, finals, edges, number, counts)
+
+    final = array('B')
+    edge_start = array('I', [0])
+    edge_char, edge_target, edge_output = array('I'), array('I'), array('I')
+    for state in order:
+        final.append(finals[state])
+        output = int(finals[state])
+        for char, child in edges[state]:
+            edge_char.append(ord(char))
+            edge_target.append(number[child])
+            edge_output.append(output)
+            output += counts[number[child]]
+        edge_start.append(len(edge_char))
+    return Automaton(final, counts, edge_start, edge_char, edge_target, edge_output)
+
+def _count_words(start, finals, edges, number, counts):
+    stack = [start]
+    while stack:
+        state = stack[-1]
+        if counts[number[state]]:
+            stack.pop()
+            continue
+        pending = [child for char, child in edges[state] if not counts[number[child]]]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        counts[number[state]] = finals[state] + sum(counts[number[child]] for char, child in edges[state])
+
+def compile_database(db_path='autocomplete.db'):
+    """Stream the words table in sorted order into a compiled automaton.
+
+    Returns (automaton, frequencies, words counter version).
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_change_counter(conn)
+        conn.commit()
+        # Read the counter and the words in one transaction so they agree
+        conn.execute('BEGIN')
+        version = words_version(conn)
+        rows = conn.execute('SELECT word, frequency FROM words ORDER BY word')
+        automaton, frequencies = compile_dawg(rows)
+        conn.rollback()
+        return automaton, frequencies, version
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile autocomplete.db into a minimal DAWG")
+    parser.add_argument('--db', default='autocomplete.db')
+    parser.add_argument('--out', default=DAWG_PATH)
+    args = parser.parse_args()
+
+    automaton, frequencies, version = compile_database(args.db)
+    automaton.save(args.out, frequencies, version)
+    states = len(automaton.final)
+    print(f"Compiled {len(automaton)} words into {states} states and "
+          f"{len(automaton.edge_char)} edges ({automaton.nbytes / 1024:.1f} KiB) -> {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import sqlite3
 import random
 from word_loader import WordLoader
+from schema import insert_words
 
 class ExtendedWordLoader(WordLoader):
     def __init__(self):
@@ -147,12 +148,8 @@ class ExtendedWordLoader(WordLoader):
         }
         
         # Insert extended words
-        for category, words in extended_words.items():
-            for word in words:
-                self.cursor.execute('''
-                    INSERT OR IGNORE INTO words (word, frequency, category, language)
-                    VALUES (?, ?, ?, ?)
-                ''', (word.lower(), 0, category, 'en'))
+        insert_words(self.conn, [(word.lower(), 0, category, 'en')
+                                 for category, words in extended_words.items() for word in words])
         
         self.conn.commit()
         total_words = sum(len(words) for words in extended_words.values())
@@ -176,11 +173,7 @@ class ExtendedWordLoader(WordLoader):
             "wedding", "graduation", "retirement", "promotion", "vacation", "holiday", "festival"
         ]
         
-        for word in compound_words:
-            self.cursor.execute('''
-                INSERT OR IGNORE INTO words (word, frequency, category, language)
-                VALUES (?, ?, ?, ?)
-            ''', (word.lower(), 0, "compound", 'en'))
+        insert_words(self.conn, [(word.lower(), 0, "compound", 'en') for word in compound_words])
         
         self.conn.commit()
         print(f"Added {len(compound_words)} compound words")
@@ -200,12 +193,7 @@ class ExtendedWordLoader(WordLoader):
                 "re" + word,  # repetition prefix
             ])
         
-        for word in variations:
-            if word:  # Skip empty strings
-                self.cursor.execute('''
-                    INSERT OR IGNORE INTO words (word, frequency, category, language)
-                    VALUES (?, ?, ?, ?)
-                ''', (word.lower(), 0, "variations", 'en'))
+        insert_words(self.conn, [(word.lower(), 0, "variations", 'en') for word in variations if word])
         
         self.conn.commit()
         print(f"Added {len(variations)} word variations")
@@ -0,0 +1,196 @@
+import gzip
+import json
+import os
+import threading
+import time
+
+from database import BufferedWriter, Flusher, get_database
+from schema import (
+    STORED_SUGGESTIONS, decode_suggestions, encode_suggestions, ensure_names, name_id,
+    word_ids, word_names
+)
+
+# Raw rows are kept this long, then archived and rolled up by hour; hourly
+# rollups older than HOURLY_WINDOW are merged into daily ones
+RAW_WINDOW = 7 * 24 * 3600
+HOURLY_WINDOW = 90 * 24 * 3600
+COMPACT_INTERVAL = 3600  # Seconds between compactions
+ARCHIVE_DIR = 'history_archive'
+ARCHIVE_ROWS = 100000  # Raw rows per archive segment at most
+
+TIMESTAMP = '%Y-%m-%d %H:%M:%S'  # As written by CURRENT_TIMESTAMP (UTC)
+
+# History rows with their names joined back in, for callers and archives
+ROW_COLUMNS = 'p.name, h.suggestions, w.word, a.name, h.search_time, h.timestamp'
+ROW_TABLES = '''
+    search_history h
+    JOIN prefixes p ON p.id = h.prefix_id
+    JOIN algorithms a ON a.id = h.algorithm_id
+    LEFT JOIN words w ON w.id = h.word_id
+'''
+
+ROLLUP_UPSERT = '''
+    ON CONFLICT (granularity, bucket, prefix_id, word_id, algorithm_id) DO UPDATE SET
+        count = count + excluded.count,
+        total_time = total_time + excluded.total_time,
+        min_time = MIN(min_time, excluded.min_time),
+        max_time = MAX(max_time, excluded.max_time)
+'''
+
+def insert_searches(conn, rows):
+    """Insert (prefix, suggestions, selected_word, algorithm, search_time, timestamp) rows"""
+    ensure_names(conn, 'prefixes', [row[0] for row in rows])
+    ensure_names(conn, 'algorithms', [row[3] for row in rows])
+    # Words not in the dictionary are left out of the suggestions and stored
+    # as no selection; history never adds words
+    words = {word for row in rows for word in row[1]}
+    words.update(row[2] for row in rows if row[2])
+    ids = word_ids(conn, words)
+    conn.executemany(f'''
+        INSERT INTO search_history (prefix_id, suggestions, word_id, algorithm_id, search_time, timestamp)
+        VALUES ({name_id('prefixes')}, ?, ?, {name_id('algorithms')}, ?, ?)
+    ''', [(prefix, encode_suggestions([ids[word] for word in suggestions if word in ids]), ids.get(selected_word),
+           algorithm, search_time, timestamp)
+          for prefix, suggestions, selected_word, algorithm, search_time, timestamp in rows])
+
+def decode_rows(conn, rows, column):
+    """Rows with the packed suggestions in column turned back into word lists"""
+    lists = [decode_suggestions(row[column]) for row in rows]
+    names = word_names(conn, {word_id for ids in lists for word_id in ids})
+    return [row[:column] + ([names[word_id] for word_id in ids if word_id in names],) + row[column + 1:]
+            for row, ids in zip(rows, lists)]
+
+def _timestamp(seconds):
+    return time.strftime(TIMESTAMP, time.gmtime(seconds))
+
+class SearchHistory(Flusher):
+    """Append-only search history with retention.
+
+    add() goes through a BufferedWriter, so selections cost no database
+    round trip. Every COMPACT_INTERVAL a background thread moves raw rows
+    older than raw_window into gzip-compressed JSON-lines segments under
+    archive_dir, folding them into hourly rollups in search_rollups, and
+    merges hourly rollups older than hourly_window into daily ones. The
+    raw table therefore only holds the recent window.
+    """
+    def __init__(self, raw_window=RAW_WINDOW, hourly_window=HOURLY_WINDOW,
+                 interval=COMPACT_INTERVAL, archive_dir=ARCHIVE_DIR, database=None):
+        self.raw_window = raw_window
+        self.hourly_window = hourly_window
+        self.archive_dir = archive_dir
+        self.database = database or get_database()
+        self.writer = BufferedWriter(insert_searches, database=self.database)
+        self._start(interval, 'search-history')
+        self._wake.set()  # Compact once at start
+
+    def add(self, prefix, suggestions, selected_word, algorithm, search_time):
+        """Record a search; suggestions are the words shown, of which the
+        first STORED_SUGGESTIONS are kept"""
+        self.writer.add((prefix, tuple(suggestions[:STORED_SUGGESTIONS]), selected_word,
+                         algorithm, search_time, _timestamp(time.time())))
+
+    def recent(self, limit=50):
+        """Newest rows first, including ones not yet written, as
+        (prefix, suggestions, selected_word, algorithm, search_time, timestamp)"""
+        with self.database.reader() as conn:
+            stored = conn.execute(f'''
+                SELECT {ROW_COLUMNS} FROM {ROW_TABLES}
+                ORDER BY h.timestamp DESC LIMIT ?
+            ''', (limit,)).fetchall()
+            stored = decode_rows(conn, stored, 1)
+        pending = [row[:1] + (list(row[1]),) + row[2:] for row in list(self.writer.rows)[-limit:]]
+        pending.reverse()
+        return (pending + stored)[:limit]
+
+    def flush(self):
+        self.compact()
+
+    def close(self):
+        # No compaction at exit, only write what is buffered
+        if not self._closed:
+            self._closed = True
+            self._wake.set()
+            self._thread.join()
+        self.writer.close()
+
+    def compact(self, now=None):
+        """Archive and roll up expired rows; returns how many raw rows moved"""
+        now = time.time() if now is None else now
+        raw_cutoff = _timestamp(now - self.raw_window)
+        moved = 0
+        with self._flush_lock:
+            while True:
+                with self.database.reader() as conn:
+                    rows = conn.execute(f'''
+                        SELECT h.id, {ROW_COLUMNS} FROM {ROW_TABLES}
+                        WHERE h.timestamp < ? ORDER BY h.id LIMIT ?
+                    ''', (raw_cutoff, ARCHIVE_ROWS)).fetchall()
+                    decoded = decode_rows(conn, rows, 2)
+                if not rows:
+                    break
+                # Archive before deleting; a crash in between rewrites the
+                # same segment on the next run, as it starts at the same id.
+                # Archives hold words, not ids, so they stand on their own.
+                self._archive(decoded)
+                self.database.run(self._roll_up_raw(rows[-1][0], raw_cutoff))
+                moved += len(rows)
+            self.database.run(self._roll_up_hourly(_timestamp(now - self.hourly_window)))
+        return moved
+
+    def _archive(self, rows):
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f'search_history-{rows[0][0]:012d}.jsonl.gz')
+        temp = path + '.tmp'
+        with gzip.open(temp, 'wt', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row) + '\n')
+        os.replace(temp, path)
+
+    @staticmethod
+    def _roll_up_raw(last_id, cutoff):
+        def job(conn):
+            conn.execute(f'''
+                INSERT INTO search_rollups
+                    (granularity, bucket, prefix_id, word_id, algorithm_id,
+                     count, total_time, min_time, max_time)
+                SELECT 'hour', substr(timestamp, 1, 13) || ':00:00', prefix_id,
+                       COALESCE(word_id, 0), algorithm_id,
+                       COUNT(*), SUM(search_time), MIN(search_time), MAX(search_time)
+                FROM search_history
+                WHERE id <= ? AND timestamp < ?
+                GROUP BY 2, 3, 4, 5
+                {ROLLUP_UPSERT}
+            ''', (last_id, cutoff))
+            conn.execute('DELETE FROM search_history WHERE id <= ? AND timestamp < ?',
+                         (last_id, cutoff))
+        return job
+
+    @staticmethod
+    def _roll_up_hourly(cutoff):
+        def job(conn):
+            conn.execute(f'''
+                INSERT INTO search_rollups
+                    (granularity, bucket, prefix_id, word_id, algorithm_id,
+                     count, total_time, min_time, max_time)
+                SELECT 'day', substr(bucket, 1, 10) || ' 00:00:00', prefix_id,
+                       word_id, algorithm_id,
+                       SUM(count), SUM(total_time), MIN(min_time), MAX(max_time)
+                FROM search_rollups
+                WHERE granularity = 'hour' AND bucket < ?
+                GROUP BY 2, 3, 4, 5
+                {ROLLUP_UPSERT}
+            ''', (cutoff,))
+            conn.execute("DELETE FROM search_rollups WHERE granularity = 'hour' AND bucket < ?",
+                         (cutoff,))
+        return job
+
+_history = None
+_history_lock = threading.Lock()
+
+def get_history():
+    """The process-wide SearchHistory"""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = SearchHistory()
+        return _history
@@ -0,0 +1,109 @@
+import threading
+
+# Log-linear buckets as in HdrHistogram: values below 2 * SUB are exact, and
+# every further power of two is split into SUB buckets, so a bucket's width
+# is at most 1/SUB (about 3%) of the values it holds.
+SUB_BITS = 5
+SUB = 1 << SUB_BITS
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+def bucket_index(value):
+    if value < 2 * SUB:
+        return max(value, 0)
+    shift = value.bit_length() - SUB_BITS - 1
+    return shift * SUB + (value >> shift)
+
+def bucket_bounds(index):
+    """Smallest value in the bucket and the bucket's width"""
+    if index < 2 * SUB:
+        return index, 1
+    shift = index // SUB - 1
+    return (index - shift * SUB) << shift, 1 << shift
+
+def bucket_value(index):
+    """Value reported for the bucket: its midpoint"""
+    low, width = bucket_bounds(index)
+    return low + (width - 1) / 2
+
+class LatencyHistogram:
+    """Counts of nanosecond latencies in log-linear buckets"""
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+
+    def record(self, value, count=1):
+        index = bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+
+    def percentile(self, q):
+        """Value at percentile q (0-100), in nanoseconds"""
+        if not self.total:
+            return 0.0
+        rank = max(1, -(-self.total * q // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return bucket_value(index)
+        return bucket_value(max(self.counts))
+
+    def percentiles(self, qs=PERCENTILES):
+        return {q: self.percentile(q) for q in qs}
+
+class LatencyHistograms:
+    """One histogram per (algorithm, operation), plus the counts not yet persisted"""
+    def __init__(self):
+        self.histograms = {}
+        self.pending = {}
+        self._lock = threading.Lock()
+
+    def record(self, algorithm, operation, value):
+        key = (algorithm, operation)
+        index = bucket_index(value)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram()
+            histogram.record(value)
+            pending = (algorithm, operation, index)
+            self.pending[pending] = self.pending.get(pending, 0) + 1
+
+    def load(self, rows):
+        """Add persisted (algorithm, operation, bucket, count) rows"""
+        with self._lock:
+            for algorithm, operation, index, count in rows:
+                histogram = self.histograms.get((algorithm, operation))
+                if histogram is None:
+                    histogram = self.histograms[(algorithm, operation)] = LatencyHistogram()
+                histogram.counts[index] = histogram.counts.get(index, 0) + count
+                histogram.total += count
+
+    def take_pending(self):
+        """(algorithm, operation, bucket, count) rows recorded since the last call"""
+        with self._lock:
+            pending, self.pending = self.pending, {}
+        return [key + (count,) for key, count in pending.items()]
+
+    def snapshot(self):
+        """Copies of every histogram, safe to read while recording continues"""
+        with self._lock:
+            copies = {}
+            for key, histogram in self.histograms.items():
+                copy = copies[key] = LatencyHistogram()
+                copy.merge(histogram)
+            return copies
+
+    def by_algorithm(self, prefix=''):
+        """Histograms merged across the operations starting with prefix"""
+        merged = {}
+        for (algorithm, operation), histogram in self.snapshot().items():
+            if operation.startswith(prefix):
+                merged.setdefault(algorithm, LatencyHistogram()).merge(histogram)
+        return merged
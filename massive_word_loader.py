@@ -1,6 +1,7 @@
 import sqlite3
 import itertools
 from extended_word_loader import ExtendedWordLoader
+from schema import insert_words
 
 class MassiveWordLoader(ExtendedWordLoader):
     def __init__(self):
@@ -97,11 +98,7 @@ class MassiveWordLoader(ExtendedWordLoader):
             "phylum", "kingdom", "evolution", "mutation", "adaptation", "extinction", "fossil"
         ]
         
-        for word in technical_words:
-            self.cursor.execute('''
-                INSERT OR IGNORE INTO words (word, frequency, category, language)
-                VALUES (?, ?, ?, ?)
-            ''', (word.lower(), 0, "technical", 'en'))
+        insert_words(self.conn, [(word.lower(), 0, "technical", 'en') for word in technical_words])
         
         self.conn.commit()
         print(f"Added {len(technical_words)} technical terms")
@@ -129,11 +126,7 @@ class MassiveWordLoader(ExtendedWordLoader):
             "infrastructure", "transportation", "shipping", "aviation", "railway", "highway"
         ]
         
-        for word in business_extended:
-            self.cursor.execute('''
-                INSERT OR IGNORE INTO words (word, frequency, category, language)
-                VALUES (?, ?, ?, ?)
-            ''', (word.lower(), 0, "business", 'en'))
+        insert_words(self.conn, [(word.lower(), 0, "business", 'en') for word in business_extended])
         
         self.conn.commit()
         print(f"Added {len(business_extended)} business terms")
@@ -161,11 +154,7 @@ class MassiveWordLoader(ExtendedWordLoader):
             "optometrist", "chiropractor", "acupuncturist", "nutritionist", "dietitian"
         ]
         
-        for word in medical_extended:
-            self.cursor.execute('''
-                INSERT OR IGNORE INTO words (word, frequency, category, language)
-                VALUES (?, ?, ?, ?)
-            ''', (word.lower(), 0, "medical", 'en'))
+        insert_words(self.conn, [(word.lower(), 0, "medical", 'en') for word in medical_extended])
         
         self.conn.commit()
         print(f"Added {len(medical_extended)} medical terms")
@@ -193,11 +182,7 @@ class MassiveWordLoader(ExtendedWordLoader):
             "immigration", "citizenship", "naturalization", "deportation", "visa", "passport"
         ]
         
-        for word in legal_terms:
-            self.cursor.execute('''
-                INSERT OR IGNORE INTO words (word, frequency, category, language)
-                VALUES (?, ?, ?, ?)
-            ''', (word.lower(), 0, "legal", 'en'))
+        insert_words(self.conn, [(word.lower(), 0, "legal", 'en') for word in legal_terms])
         
         self.conn.commit()
         print(f"Added {len(legal_terms)} legal terms")
@@ -208,11 +193,7 @@ class MassiveWordLoader(ExtendedWordLoader):
         
         # Load generated words
         generated_words = self.generate_common_prefixes_suffixes()
-        for word in generated_words:
-            self.cursor.execute('''
-                INSERT OR IGNORE INTO words (word, frequency, category, language)
-                VALUES (?, ?, ?, ?)
-            ''', (word.lower(), 0, "generated", 'en'))
+        insert_words(self.conn, [(word.lower(), 0, "generated", 'en') for word in generated_words])
         
         self.conn.commit()
         print(f"Added {len(generated_words)} generated words")
@@ -0,0 +1,144 @@
+import hashlib
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+# Dictionaries with at most this many distinct prefixes get the exact filter
+EXACT_LIMIT = 250000
+
+MASK = (1 << 64) - 1
+
+def _hash(text):
+    """Stable 64-bit hash; Python's hash() is salted per process"""
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'little')
+
+def _mix(value, seed):
+    # splitmix64 finalizer over hash + seed
+    z = (value + seed + 0x9E3779B97F4A7C15) & MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+    return z ^ (z >> 31)
+
+def _mix_array(values, seed):
+    z = values + np.uint64((seed + 0x9E3779B97F4A7C15) & MASK)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+def _prefix_hashes(words):
+    prefixes = {word[:i] for word in words for i in range(1, len(word) + 1)}
+    return np.unique(np.fromiter(map(_hash, prefixes), dtype=np.uint64, count=len(prefixes)))
+
+class PrefixFilter:
+    """Answers "can any word start with this prefix?" before an engine is searched.
+
+    Sized from the number of distinct prefixes at build time. Up to
+    EXACT_LIMIT prefixes it keeps their sorted 64-bit hashes, which is exact
+    short of a hash collision. Beyond that it is a static 8-bit xor filter:
+    about 9.9 bits per prefix and a 1/256 false-positive rate. Neither can
+    be extended, so prefixes of words added later go to an exact side set.
+    """
+    EXACT, XOR = 0, 1
+
+    def __init__(self, kind, seed, table):
+        self.kind = kind
+        self.seed = seed
+        self.table = table
+        self.view = memoryview(table)  # Plain int lookups, no numpy scalars
+        self.block = len(table) // 3
+        self.extra = set()
+
+    @classmethod
+    def build(cls, words, exact_limit=EXACT_LIMIT):
+        hashes = _prefix_hashes(words)
+        if len(hashes) <= exact_limit:
+            return cls(cls.EXACT, 0, hashes)
+        for seed in range(1, 64):
+            table = cls._build_xor(hashes, seed)
+            if table is not None:
+                return cls(cls.XOR, seed, table)
+        raise RuntimeError("could not build a xor filter for the prefix set")
+
+    @staticmethod
+    def _slots(mixed, block):
+        return (mixed % block,
+                (mixed >> 21) % block + block,
+                (mixed >> 42) % block + 2 * block)
+
+    @classmethod
+    def _build_xor(cls, hashes, seed):
+        """Fingerprint table for one seed, or None if the key set does not peel"""
+        n = len(hashes)
+        block = (int(1.23 * n) + 32) // 3 + 1
+        mixed = _mix_array(hashes, seed)
+        slots = np.stack([s.astype(np.int64) for s in cls._slots(mixed, np.uint64(block))])
+        fingerprints = ((mixed ^ (mixed >> np.uint64(32))) & np.uint64(0xFF)).astype(np.uint8)
+
+        # Peel: repeatedly remove keys that are alone in one of their slots.
+        # Keys peeled in the same round never share their own slot, so each
+        # round can be assigned as a batch in reverse order afterwards.
+        keys = np.arange(n, dtype=np.int64)
+        count = np.bincount(slots.ravel(), minlength=3 * block)
+        owner = np.zeros(3 * block, dtype=np.int64)
+        for row in slots:
+            np.bitwise_xor.at(owner, row, keys)
+        rounds = []
+        peeled = 0
+        while True:
+            single = np.flatnonzero(count == 1)
+            if not single.size:
+                break
+            batch, first = np.unique(owner[single], return_index=True)
+            rounds.append((batch, single[first]))
+            peeled += len(batch)
+            for row in slots[:, batch]:
+                np.subtract.at(count, row, 1)
+                np.bitwise_xor.at(owner, row, batch)
+        if peeled != n:
+            return None
+
+        table = np.zeros(3 * block, dtype=np.uint8)
+        for batch, own in reversed(rounds):
+            table[own] = (fingerprints[batch] ^ table[slots[0, batch]]
+                          ^ table[slots[1, batch]] ^ table[slots[2, batch]])
+        return table
+
+    def _contains(self, prefix):
+        value = _hash(prefix)
+        view = self.view
+        if self.kind == self.EXACT:
+            index = bisect_left(view, value)
+            return index < len(view) and view[index] == value
+        mixed = _mix(value, self.seed)
+        h0, h1, h2 = self._slots(mixed, self.block)
+        return (mixed ^ (mixed >> 32)) & 0xFF == view[h0] ^ view[h1] ^ view[h2]
+
+    def __contains__(self, prefix):
+        return prefix in self.extra or self._contains(prefix)
+
+    def add(self, word):
+        for i in range(1, len(word) + 1):
+            if not self._contains(word[:i]):
+                self.extra.add(word[:i])
+
+    @property
+    def expected_fpr(self):
+        return 0.0 if self.kind == self.EXACT else 1 / 256
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+    def tables(self):
+        """Arrays of the built filter, for write_snapshot"""
+        return {
+            'prefix_filter': self.table,
+            'prefix_meta': array('Q', [self.kind, self.seed]),
+        }
+
+    @classmethod
+    def from_tables(cls, tables):
+        kind, seed = tables['prefix_meta']
+        dtype = np.uint64 if kind == cls.EXACT else np.uint8
+        return cls(kind, seed, np.frombuffer(tables['prefix_filter'], dtype=dtype))
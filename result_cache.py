@@ -0,0 +1,147 @@
+import bisect
+import collections
+import sys
+import threading
+
+# Count-min sketch rows; each access bumps one 4-bit counter per row
+SKETCH_DEPTH = 4
+SKETCH_MAX = 15
+# Halves every counter, so past popularity fades
+_HALVE = bytes(count >> 1 for count in range(256))
+# Bytes charged per entry on top of its key and value: the LRU link, the
+# prefix index and the dict slots
+ENTRY_OVERHEAD = 200
+
+def _sizeof(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(_sizeof(item) for item in value)
+    return size
+
+class FrequencySketch:
+    """Approximate access counts of recently seen keys (TinyLFU).
+
+    Counters saturate at SKETCH_MAX and are all halved every sample
+    increments, so the estimate tracks recent popularity.
+    """
+    def __init__(self, width):
+        self.width = 1 << max(width - 1, 1).bit_length()
+        self.table = bytearray(self.width * SKETCH_DEPTH)
+        self.sample = 10 * self.width
+        self.additions = 0
+
+    def _slots(self, key):
+        mask = self.width - 1
+        return [row * self.width + (hash((row, key)) & mask) for row in range(SKETCH_DEPTH)]
+
+    def increment(self, key):
+        table = self.table
+        for slot in self._slots(key):
+            if table[slot] < SKETCH_MAX:
+                table[slot] += 1
+        self.additions += 1
+        if self.additions >= self.sample:
+            self.table = bytearray(self.table.translate(_HALVE))
+            self.additions //= 2
+
+    def estimate(self, key):
+        table = self.table
+        return min(table[slot] for slot in self._slots(key))
+
+class ResultCache:
+    """Query results keyed by (prefix, *rest), bounded by their size in bytes.
+
+    Entries are kept in LRU order. When a new entry does not fit, it only
+    replaces the LRU victims if the frequency sketch has seen it more often
+    than each of them (TinyLFU admission), so a burst of one-off prefixes
+    cannot push out the hot ones. invalidate() drops the entries whose
+    prefix starts a changed word; lookups that began before it cannot store
+    their now stale result afterwards.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.size = 0
+        self.entries = collections.OrderedDict()  # key -> (value, size)
+        self.by_prefix = {}
+        self.sketch = FrequencySketch(capacity // 256)
+        self.epoch = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """(value, epoch); value is None on a miss, epoch goes to put()"""
+        with self._lock:
+            self.sketch.increment(key)
+            entry = self.entries.get(key)
+            if entry is None:
+                return None, self.epoch
+            self.entries.move_to_end(key)
+            return entry[0], self.epoch
+
+    def put(self, key, value, epoch):
+        """Store a value computed after get() returned epoch.
+
+        Returns how many entries were evicted for it, or None if admission
+        turned it away. Values invalidated since get() are dropped silently.
+        """
+        size = ENTRY_OVERHEAD + _sizeof(key) + _sizeof(value)
+        with self._lock:
+            if epoch != self.epoch or key in self.entries:
+                return 0
+            if size > self.capacity:
+                return None
+            # Admit only if the candidate is more popular than every victim
+            frequency = self.sketch.estimate(key)
+            victims, freed = [], 0
+            for victim in self.entries:
+                if self.size - freed + size <= self.capacity:
+                    break
+                if self.sketch.estimate(victim) >= frequency:
+                    return None
+                victims.append(victim)
+                freed += self.entries[victim][1]
+            for victim in victims:
+                self._remove(victim)
+            self.entries[key] = (value, size)
+            self.size += size
+            self.by_prefix.setdefault(key[0], set()).add(key)
+            return len(victims)
+
+    def _remove(self, key):
+        value, size = self.entries.pop(key)
+        self.size -= size
+        keys = self.by_prefix[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self.by_prefix[key[0]]
+
+    def invalidate(self, words):
+        """Drop the entries for every prefix of the given words; returns how many"""
+        words = list(words)
+        with self._lock:
+            self.epoch += 1
+            if sum(map(len, words)) <= len(self.by_prefix):
+                prefixes = {word[:end] for word in words for end in range(len(word) + 1)}
+            else:
+                # Fewer cached prefixes than word prefixes: test each cached one
+                ordered = sorted(words)
+                prefixes = []
+                for prefix in self.by_prefix:
+                    index = bisect.bisect_left(ordered, prefix)
+                    if index < len(ordered) and ordered[index].startswith(prefix):
+                        prefixes.append(prefix)
+            dropped = 0
+            for prefix in prefixes:
+                for key in list(self.by_prefix.get(prefix, ())):
+                    self._remove(key)
+                    dropped += 1
+            return dropped
+
+    def clear(self):
+        with self._lock:
+            self.epoch += 1
+            self.entries.clear()
+            self.by_prefix.clear()
+            self.size = 0
@@ -0,0 +1,288 @@
+import array
+import json
+import sqlite3
+import sys
+
+from snapshot import ensure_change_counter
+
+# Normalized schema: words have integer ids, repeated strings (categories,
+# languages, algorithms, operations, prefixes) live in dictionary tables,
+# and history and metrics rows refer to both by id. Bumped with each
+# migration; stored in PRAGMA user_version.
+SCHEMA_VERSION = 2
+
+# Suggestions stored per search at most: the most either app shows at once
+STORED_SUGGESTIONS = 10
+
+TABLES = '''
+    CREATE TABLE IF NOT EXISTS categories (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+    CREATE TABLE IF NOT EXISTS languages (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+    CREATE TABLE IF NOT EXISTS algorithms (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+    CREATE TABLE IF NOT EXISTS operations (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+    CREATE TABLE IF NOT EXISTS prefixes (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+
+    -- The UNIQUE index on word carries the rowid, so word -> id is index-only
+    CREATE TABLE IF NOT EXISTS words (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        word TEXT UNIQUE NOT NULL,
+        frequency INTEGER NOT NULL DEFAULT 0,
+        category_id INTEGER REFERENCES categories (id),
+        language_id INTEGER REFERENCES languages (id),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- suggestions holds the word ids shown, packed by encode_suggestions
+    CREATE TABLE IF NOT EXISTS search_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        prefix_id INTEGER NOT NULL REFERENCES prefixes (id),
+        suggestions BLOB NOT NULL,
+        word_id INTEGER REFERENCES words (id),
+        algorithm_id INTEGER NOT NULL REFERENCES algorithms (id),
+        search_time REAL NOT NULL,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS performance_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        algorithm_id INTEGER NOT NULL REFERENCES algorithms (id),
+        operation_id INTEGER NOT NULL REFERENCES operations (id),
+        execution_time REAL NOT NULL,
+        memory_usage REAL,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Hourly and daily aggregates of archived search_history rows (see
+    -- history.py); word_id is 0 for searches without a selection
+    CREATE TABLE IF NOT EXISTS search_rollups (
+        granularity TEXT NOT NULL,
+        bucket TIMESTAMP NOT NULL,
+        prefix_id INTEGER NOT NULL REFERENCES prefixes (id),
+        word_id INTEGER NOT NULL,
+        algorithm_id INTEGER NOT NULL REFERENCES algorithms (id),
+        count INTEGER NOT NULL,
+        total_time REAL NOT NULL,
+        min_time REAL NOT NULL,
+        max_time REAL NOT NULL,
+        PRIMARY KEY (granularity, bucket, prefix_id, word_id, algorithm_id)
+    ) WITHOUT ROWID;
+
+    -- Latency histogram buckets (see latency.py), in nanoseconds
+    CREATE TABLE IF NOT EXISTS latency_histograms (
+        algorithm_id INTEGER NOT NULL REFERENCES algorithms (id),
+        operation_id INTEGER NOT NULL REFERENCES operations (id),
+        bucket INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (algorithm_id, operation_id, bucket)
+    ) WITHOUT ROWID;
+'''
+
+# Created after a migration has dropped the legacy tables, whose indexes
+# and view would otherwise still hold these names
+INDEXES = '''
+    CREATE INDEX IF NOT EXISTS idx_words_category ON words (category_id);
+    CREATE INDEX IF NOT EXISTS idx_words_language ON words (language_id);
+    CREATE INDEX IF NOT EXISTS idx_search_history_timestamp ON search_history (timestamp);
+
+    -- Every recorded search: recent raw rows plus rolled-up history
+    CREATE VIEW IF NOT EXISTS search_activity AS
+        SELECT prefix_id, word_id, algorithm_id, 1 AS count, search_time AS total_time
+        FROM search_history
+        UNION ALL
+        SELECT prefix_id, NULLIF(word_id, 0), algorithm_id, count, total_time
+        FROM search_rollups;
+'''
+
+# Legacy table -> statement copying its rows into the new table, in order:
+# words first, so history and rollups can look up selected words by id
+MIGRATIONS = {
+    'words': '''
+        INSERT INTO words (id, word, frequency, category_id, language_id, created_at)
+        SELECT w.id, w.word, COALESCE(w.frequency, 0), c.id, l.id, w.created_at
+        FROM legacy_words w
+        LEFT JOIN categories c ON c.name = w.category
+        LEFT JOIN languages l ON l.name = w.language
+    ''',
+    'search_history': '''
+        INSERT INTO search_history (id, prefix_id, suggestions, word_id, algorithm_id, search_time, timestamp)
+        SELECT h.id, p.id, h.suggestions, w.id, a.id, h.search_time, h.timestamp
+        FROM legacy_search_history h
+        JOIN prefixes p ON p.name = h.prefix
+        JOIN algorithms a ON a.name = h.algorithm
+        LEFT JOIN words w ON w.word = h.selected_word
+    ''',
+    'performance_metrics': '''
+        INSERT INTO performance_metrics (id, algorithm_id, operation_id, execution_time, memory_usage, timestamp)
+        SELECT m.id, a.id, o.id, m.execution_time, m.memory_usage, m.timestamp
+        FROM legacy_performance_metrics m
+        JOIN algorithms a ON a.name = m.algorithm
+        JOIN operations o ON o.name = m.operation
+    ''',
+    'latency_histograms': '''
+        INSERT INTO latency_histograms (algorithm_id, operation_id, bucket, count)
+        SELECT a.id, o.id, h.bucket, h.count
+        FROM legacy_latency_histograms h
+        JOIN algorithms a ON a.name = h.algorithm
+        JOIN operations o ON o.name = h.operation
+    ''',
+    # Selections of words not in the dictionary fold into word_id 0 with
+    # the searches that selected nothing
+    'search_rollups': '''
+        INSERT INTO search_rollups
+            (granularity, bucket, prefix_id, word_id, algorithm_id, count, total_time, min_time, max_time)
+        SELECT r.granularity, r.bucket, p.id, COALESCE(w.id, 0), a.id,
+               SUM(r.count), SUM(r.total_time), MIN(r.min_time), MAX(r.max_time)
+        FROM legacy_search_rollups r
+        JOIN prefixes p ON p.name = r.prefix
+        JOIN algorithms a ON a.name = r.algorithm
+        LEFT JOIN words w ON w.word = r.selected_word
+        GROUP BY 1, 2, 3, 4, 5
+    ''',
+}
+
+# Dictionary table -> legacy (table, column) pairs its names come from
+LEGACY_NAMES = {
+    'categories': (('words', 'category'),),
+    'languages': (('words', 'language'),),
+    'algorithms': (('search_history', 'algorithm'), ('performance_metrics', 'algorithm'),
+                   ('latency_histograms', 'algorithm'), ('search_rollups', 'algorithm')),
+    'operations': (('performance_metrics', 'operation'), ('latency_histograms', 'operation')),
+    'prefixes': (('search_history', 'prefix'), ('search_rollups', 'prefix')),
+}
+
+# Objects that refer to legacy columns, dropped along with every trigger;
+# the view is recreated with INDEXES, the catalog by ensure_stats_catalog
+DERIVED = ('VIEW search_activity', 'TABLE stats_catalog', 'TABLE stats_values', 'TABLE metric_totals')
+
+def name_id(table):
+    """SQL expression for the id of a ? name in a dictionary table"""
+    return f'(SELECT id FROM {table} WHERE name = ?)'
+
+def ensure_names(conn, table, names):
+    """Add the names missing from a dictionary table"""
+    conn.executemany(f'INSERT OR IGNORE INTO {table} (name) VALUES (?)',
+                     [(name,) for name in set(names) if name is not None])
+
+WORD_INSERT = f'''
+    INSERT OR IGNORE INTO words (word, frequency, category_id, language_id)
+    VALUES (?, ?, {name_id('categories')}, {name_id('languages')})
+'''
+WORD_UPSERT = f'''
+    INSERT INTO words (word, frequency, category_id, language_id)
+    VALUES (?, ?, {name_id('categories')}, {name_id('languages')})
+    ON CONFLICT (word) DO UPDATE SET frequency = excluded.frequency,
+        category_id = excluded.category_id, language_id = excluded.language_id
+'''
+
+def insert_words(conn, rows, replace=False):
+    """Insert (word, frequency, category, language) rows; returns how many changed.
+
+    Existing words are skipped, or updated in place with replace=True, so
+    their ids never change.
+    """
+    rows = list(rows)
+    ensure_names(conn, 'categories', [row[2] for row in rows])
+    ensure_names(conn, 'languages', [row[3] for row in rows])
+    return conn.executemany(WORD_UPSERT if replace else WORD_INSERT, rows).rowcount
+
+def insert_metrics(conn, rows):
+    """Insert (algorithm, operation, execution_time) rows into performance_metrics"""
+    ensure_names(conn, 'algorithms', [row[0] for row in rows])
+    ensure_names(conn, 'operations', [row[1] for row in rows])
+    conn.executemany(f'''
+        INSERT INTO performance_metrics (algorithm_id, operation_id, execution_time)
+        VALUES ({name_id('algorithms')}, {name_id('operations')}, ?)
+    ''', rows)
+
+# One statement resolves a whole batch, passed in as a JSON array
+WORD_IDS = 'SELECT j.value, w.id FROM json_each(?) j JOIN words w ON w.word = j.value'
+WORD_NAMES = 'SELECT w.id, w.word FROM json_each(?) j JOIN words w ON w.id = j.value'
+
+def word_ids(conn, words):
+    """Map each word in the table to its id; other words are left out, as
+    history must not add words to the dictionary"""
+    return dict(conn.execute(WORD_IDS, (json.dumps(list(words)),)))
+
+def word_names(conn, ids):
+    """Map each word id to its word; ids of deleted words are left out"""
+    return dict(conn.execute(WORD_NAMES, (json.dumps(list(ids)),)))
+
+# Suggestion lists are stored as little-endian uint32 word ids: 4 bytes a
+# suggestion instead of the word quoted in a JSON array
+def encode_suggestions(ids):
+    packed = array.array('I', ids)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+def decode_suggestions(blob):
+    packed = array.array('I')
+    packed.frombytes(blob)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tolist()
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+def ensure_schema(conn):
+    """Create the normalized tables, migrating an older database first"""
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        # Nothing to do; the DDL below would also commit the caller's transaction
+        return
+    if version < 1:
+        if 'category' in _columns(conn, 'words'):
+            _migrate_legacy(conn)
+            version = 1
+        else:
+            conn.executescript(TABLES + INDEXES + f'PRAGMA user_version = {SCHEMA_VERSION};')
+            version = SCHEMA_VERSION
+    if version < 2:
+        _pack_suggestions(conn)
+    # Versions the words table so stale snapshots can be detected
+    ensure_change_counter(conn)
+
+def _migrate_legacy(conn):
+    """Rewrite the text-keyed tables in one transaction, keeping every row id"""
+    legacy = [table for table in MIGRATIONS if _columns(conn, table)]
+    triggers = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")]
+    script = ['BEGIN;']
+    script += [f'DROP TRIGGER {name};' for name in triggers]
+    script += [f'DROP {kind} IF EXISTS {name};' for kind, name in (d.split() for d in DERIVED)]
+    script += [f'ALTER TABLE {table} RENAME TO legacy_{table};' for table in legacy]
+    script.append(TABLES)
+    for table, sources in LEGACY_NAMES.items():
+        for source, column in sources:
+            if source in legacy:
+                script.append(f'''
+                    INSERT OR IGNORE INTO {table} (name)
+                    SELECT DISTINCT {column} FROM legacy_{source} WHERE {column} IS NOT NULL;''')
+    for table in legacy:
+        script.append(MIGRATIONS[table] + ';')
+    script += [f'DROP TABLE legacy_{table};' for table in legacy]
+    script.append(INDEXES)
+    script.append('PRAGMA user_version = 1;')
+    script.append('COMMIT;')
+    try:
+        conn.executescript('\n'.join(script))
+    except sqlite3.Error:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+
+def _pack_suggestions(conn):
+    """Version 2: JSON suggestion lists become packed word ids, capped to
+    STORED_SUGGESTIONS"""
+    try:
+        rows = conn.execute(
+            "SELECT id, suggestions FROM search_history WHERE typeof(suggestions) = 'text'").fetchall()
+        lists = [(row_id, json.loads(text)[:STORED_SUGGESTIONS]) for row_id, text in rows]
+        ids = word_ids(conn, {word for _, words in lists for word in words})
+        conn.executemany('UPDATE search_history SET suggestions = ? WHERE id = ?',
+                         [(encode_suggestions([ids[word] for word in words if word in ids]), row_id)
+                          for row_id, words in lists])
+        conn.execute('PRAGMA user_version = 2')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
@@ -0,0 +1,155 @@
+import threading
+import time
+from contextlib import contextmanager
+
+class _Copy:
+    def __init__(self, state):
+        self.state = state
+        self.readers = set()
+
+class SnapshotSwap:
+    """Two copies of an in-memory state shared by every session in the process.
+
+    Readers always use the published copy and take no lock; the published copy
+    is never mutated. A writer applies its change to the standby copy,
+    publishes it with a single reference assignment, waits for readers still
+    holding the old copy to leave, then replays the change there so the copies
+    agree again. Changes must therefore be deterministic: the same function
+    is applied once to each copy.
+    """
+    def __init__(self, first, second):
+        self._published = _Copy(first)
+        self._standby = _Copy(second)
+        self._write_lock = threading.Lock()
+        self.version = 0
+
+    @property
+    def current(self):
+        """Published state, for reads that do not touch mutable structures"""
+        return self._published.state
+
+    @contextmanager
+    def read(self):
+        token = object()
+        while True:
+            copy = self._published
+            copy.readers.add(token)
+            # A writer may have swapped between the load and the registration;
+            # it would not have seen us, so move on to the new copy.
+            if copy is self._published:
+                break
+            copy.readers.discard(token)
+        try:
+            yield copy.state
+        finally:
+            copy.readers.discard(token)
+
+    def write(self, change):
+        """Apply change(state) to both copies; returns the first result"""
+        with self._write_lock:
+            standby = self._standby
+            result = change(standby.state)
+            retired, self._published = self._published, standby
+            self.version += 1
+            while retired.readers:
+                time.sleep(0.0001)
+            change(retired.state)
+            self._standby = retired
+            return result
+
+def catch_up(algorithm, before, after):
+    """Bring an engine built from the words dict before up to the dict after.
+
+    Words are never removed, so new ones are inserted and changed
+    frequencies replayed as increments, where the engine has them.
+    """
+    increments = hasattr(algorithm, 'increment')
+    for word, frequency in after.items():
+        old = before.get(word)
+        if old is None:
+            algorithm.insert(word, frequency)
+        elif old != frequency and increments:
+            algorithm.increment(word, frequency - old)
+
+class LazyBuilder:
+    """Builds the engines of a SnapshotSwap state on first use.
+
+    The state exposes a dict of built engines as `algorithms` plus
+    source(), create(name, source), install(name, engine, source) and
+    release(name). A worker thread builds one engine per copy from a
+    source taken under a read, outside the write lock, so writes are not
+    held up by the build; install() then catches each engine up with the
+    writes made meanwhile and publishes it through SnapshotSwap.write.
+    Until then, queries are routed to the most recently used engine that is
+    already built. Every copy holds its own engines, so a built engine costs
+    twice its size; engines left unused for idle_timeout seconds are
+    released again.
+    """
+    def __init__(self, swap, background=True, idle_timeout=None):
+        self.swap = swap
+        self.background = background
+        self.idle_timeout = idle_timeout
+        self.last_used = {}
+        self._builds = {}
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def built(self):
+        with self.swap.read() as state:
+            return list(state.algorithms)
+
+    def resolve(self, name):
+        """Name of the engine that should answer a query for name"""
+        now = time.monotonic()
+        self.last_used[name] = now
+        built = self.built()
+        if name not in built:
+            self._schedule(name, wait=not built or not self.background)
+            built = self.built()
+            if name not in built and built:
+                name = max(built, key=lambda other: self.last_used.get(other, 0.0))
+                self.last_used[name] = now
+        self._release_idle(now)
+        return name
+
+    def _schedule(self, name, wait):
+        with self._lock:
+            worker = self._builds.get(name)
+            if worker is None:
+                worker = threading.Thread(target=self._build, args=(name,), daemon=True)
+                self._builds[name] = worker
+                worker.start()
+        if wait:
+            worker.join()
+
+    def _build(self, name):
+        try:
+            with self.swap.read() as state:
+                if name in state.algorithms:
+                    return
+                source = state.source()
+            engines = [state.create(name, source) for _ in range(2)]
+            self.swap.write(lambda state: state.install(name, engines.pop(), source))
+            self.last_used[name] = time.monotonic()
+        finally:
+            with self._lock:
+                del self._builds[name]
+
+    def _release_idle(self, now):
+        if self.idle_timeout is None or now < self._next_sweep:
+            return
+        self._next_sweep = now + self.idle_timeout / 2
+        built = self.built()
+        for name in built:
+            # Engines that came prebuilt start their idle clock now
+            self.last_used.setdefault(name, now)
+        idle = [name for name in built if now - self.last_used[name] > self.idle_timeout]
+        if not idle:
+            return
+
+        def release(state):
+            for name in idle:
+                state.release(name)
+
+        # Releasing takes the write lock, which a running build may hold
+        threading.Thread(target=self.swap.write, args=(release,), daemon=True).start()
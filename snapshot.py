@@ -0,0 +1,133 @@
+import argparse
+import mmap
+import os
+import sqlite3
+import struct
+import zlib
+
+MAGIC = b'FTSNAP01'
+FORMAT_VERSION = 2
+SNAPSHOT_PATH = 'autocomplete.snap'
+
+# magic, format version, words change counter, section count, payload crc32
+HEADER = struct.Struct('<8sIQII')
+# name, typecode, item size, offset, item count
+SECTION = struct.Struct('<16scB6xQQ')
+ALIGN = 8
+
+def ensure_change_counter(conn):
+    """Create the counter that every change to the words table bumps"""
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS change_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        );
+        INSERT OR IGNORE INTO change_counters (name, value) VALUES ('words', 0);
+        CREATE TRIGGER IF NOT EXISTS words_counter_insert AFTER INSERT ON words
+        BEGIN UPDATE change_counters SET value = value + 1 WHERE name = 'words'; END;
+        CREATE TRIGGER IF NOT EXISTS words_counter_update AFTER UPDATE ON words
+        BEGIN UPDATE change_counters SET value = value + 1 WHERE name = 'words'; END;
+        CREATE TRIGGER IF NOT EXISTS words_counter_delete AFTER DELETE ON words
+        BEGIN UPDATE change_counters SET value = value + 1 WHERE name = 'words'; END;
+    ''')
+
+def words_version(conn):
+    """Current words counter, or None if the database predates it"""
+    try:
+        row = conn.execute("SELECT value FROM change_counters WHERE name = 'words'").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+def write_snapshot(path, sections, version):
+    """Write named buffers (arrays or bytes) to path, replacing it atomically"""
+    views = {name: memoryview(table) for name, table in sections.items()}
+    for name in views:
+        if len(name.encode()) > 16:
+            raise ValueError(f"section name too long: {name}")
+    offset = HEADER.size + SECTION.size * len(views)
+    layout = []
+    for name, view in views.items():
+        offset += -offset % ALIGN
+        layout.append((name, view, offset))
+        offset += view.nbytes
+
+    checksum = 0
+    for name, view, start in layout:
+        checksum = zlib.crc32(view.cast('B'), checksum)
+
+    temp = path + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, version, len(layout), checksum))
+        for name, view, start in layout:
+            f.write(SECTION.pack(name.encode(), view.format.encode(), view.itemsize, start, len(view)))
+        for name, view, start in layout:
+            f.write(bytes(start - f.tell()))
+            f.write(view)
+    os.replace(temp, path)
+
+class Snapshot:
+    """A validated snapshot file whose sections are mapped on demand"""
+    def __init__(self, path, version, layout):
+        self.path = path
+        self.version = version
+        self.layout = layout
+
+    def tables(self):
+        """Copy-on-write views of every section, keyed by name.
+
+        Each call maps the file again, so callers can modify their views
+        (e.g. frequencies) without affecting other mappings or the file.
+        """
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        view = memoryview(mapped)
+        return {
+            name: view[start:start + itemsize * count].cast(typecode)
+            for name, typecode, itemsize, start, count in self.layout
+        }
+
+def open_snapshot(path, version):
+    """Snapshot at path, or None if it is missing, corrupt or not for version"""
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        if len(mapped) < HEADER.size:
+            return None
+        magic, format_version, stored, count, checksum = HEADER.unpack_from(mapped)
+        if magic != MAGIC or format_version != FORMAT_VERSION or stored != version:
+            return None
+        layout = []
+        for index in range(count):
+            name, typecode, itemsize, start, items = SECTION.unpack_from(
+                mapped, HEADER.size + index * SECTION.size)
+            typecode = typecode.decode()
+            if start + itemsize * items > len(mapped) or struct.calcsize(typecode) != itemsize:
+                return None
+            layout.append((name.rstrip(b'\0').decode(), typecode, itemsize, start, items))
+
+        crc = 0
+        with memoryview(mapped) as view:
+            for name, typecode, itemsize, start, items in layout:
+                crc = zlib.crc32(view[start:start + itemsize * items], crc)
+        if crc != checksum:
+            return None
+    finally:
+        mapped.close()
+    return Snapshot(path, version, layout)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile autocomplete.db into a memory-mappable snapshot")
+    parser.add_argument('--db', default='autocomplete.db')
+    parser.add_argument('--out', default=SNAPSHOT_PATH)
+    args = parser.parse_args()
+
+    from advanced_app import compile_snapshot
+    words = compile_snapshot(args.db, args.out)
+    print(f"Wrote {words} words ({os.path.getsize(args.out) / 1024:.1f} KiB) -> {args.out}")
+
+if __name__ == "__main__":
+    main()
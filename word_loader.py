@@ -2,10 +2,13 @@ import sqlite3
 import requests
 from typing import List, Dict
 
+from schema import ensure_schema, insert_words
+
 class WordLoader:
     def __init__(self):
         self.conn = sqlite3.connect('autocomplete.db')
         self.cursor = self.conn.cursor()
+        ensure_schema(self.conn)
     
     def load_comprehensive_dictionary(self):
         """Load a comprehensive dictionary with thousands of words"""
@@ -188,12 +191,8 @@ class WordLoader:
         }
         
         # Insert words into database with categories
-        for category, words in all_words.items():
-            for word in words:
-                self.cursor.execute('''
-                    INSERT OR IGNORE INTO words (word, frequency, category, language)
-                    VALUES (?, ?, ?, ?)
-                ''', (word.lower(), 0, category, 'en'))
+        insert_words(self.conn, [(word.lower(), 0, category, 'en')
+                                 for category, words in all_words.items() for word in words])
         
         self.conn.commit()
         print(f"Loaded {sum(len(words) for words in all_words.values())} words into database")
@@ -219,11 +218,7 @@ class WordLoader:
             "staging", "development", "environment", "configuration", "deployment", "pipeline"
         ]
         
-        for word in programming_words:
-            self.cursor.execute('''
-                INSERT OR IGNORE INTO words (word, frequency, category, language)
-                VALUES (?, ?, ?, ?)
-            ''', (word.lower(), 0, "programming", 'en'))
+        insert_words(self.conn, [(word.lower(), 0, "programming", 'en') for word in programming_words])
         
         self.conn.commit()
         print(f"Added {len(programming_words)} programming keywords")